@@ -9,30 +9,129 @@ from config import Config
 db = SQLAlchemy()
 migrate = Migrate()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if test_config:
+        app.config.update(test_config)
 
     CORS(app, 
          resources={
              r"/api/*": {
                  "origins": ["http://127.0.0.1:5500", "http://localhost:5500"],
                  "supports_credentials": True,
-                 "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-                 "allow_headers": ["Content-Type", "Authorization"]
+                 "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+                 "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key"],
+                 "expose_headers": ["X-Next-Cursor", "Link", "Idempotent-Replayed"]
              }
          })
     
     db.init_app(app)
     migrate.init_app(app, db)
-    JWTManager(app)
+    jwt = JWTManager(app)
+
+    from app.infrastructure.cache import SharedCache, build_cache
+    from app.infrastructure.cart_reaper import CartReaper
+    from app.infrastructure.cart_store import build_cart_store
+    from app.infrastructure.catalog_version import CatalogVersion
+    from app.infrastructure.idempotency import InMemoryIdempotencyStore
+    from app.infrastructure.password_hasher import PasswordHasher
+    from app.infrastructure.password_rehasher import PasswordRehasher
+    from app.infrastructure.sales_rollup_buffer import SalesRollupBuffer
+    from app.infrastructure.search_changes import SearchChangeLog
+    from app.infrastructure.search_index import ProductSearchIndex
+    from app.infrastructure.token_revocation import build_revocation_list
+    from app.infrastructure.stock_reconciler import StockReconciler
+    app.extensions['shared_cache'] = SharedCache()
+    app.extensions['product_cache'] = build_cache(
+        app.config['PRODUCT_CACHE_SIZE'],
+        app.config['PRODUCT_CACHE_TTL'],
+        app.config['CACHE_BACKEND'],
+        shared=app.extensions['shared_cache']
+    )
+    # Carts never touch the relational database
+    app.extensions['cart_store'] = build_cart_store(
+        app.config['CART_STORE'],
+        ttl=app.config['CART_TTL'],
+        maxsize=app.config['CART_MAX_CARTS'],
+        log_path=app.config['CART_LOG_PATH'],
+        log_fsync=app.config['CART_LOG_FSYNC'],
+        shared=app.extensions['shared_cache']
+    )
+    app.extensions['cart_reaper'] = CartReaper(
+        app.extensions['cart_store'],
+        interval=app.config['CART_REAP_INTERVAL'],
+        batch_size=app.config['CART_REAP_BATCH'],
+        pause=app.config['CART_REAP_PAUSE']
+    )
+
+    @app.before_request
+    def start_cart_reaper():
+        # Carts replayed from the log can be abandoned already, so reaping starts
+        # with the first request rather than the first new cart; test apps, whose
+        # TESTING flag is set after create_app, reap only when asked
+        if not app.testing:
+            app.extensions['cart_reaper'].start()
+
+    # Kept in the shared store so every worker sees the same validator
+    app.extensions['catalog_version'] = CatalogVersion(app.extensions['shared_cache'])
+    app.extensions['idempotency_store'] = InMemoryIdempotencyStore(
+        ttl=app.config['IDEMPOTENCY_TTL'],
+        wait_timeout=app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+    )
+    # Worker processes are started with the first login or registration
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+    # Logins with hashes made under older settings are upgraded in the background
+    app.extensions['password_rehasher'] = PasswordRehasher(app)
+    app.extensions['token_revocations'] = build_revocation_list(
+        app.config['TOKEN_REVOCATION_BACKEND'],
+        shared=app.extensions['shared_cache']
+    )
+
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        # Only refresh tokens are ever revoked; access requests skip the lookup
+        return (jwt_payload.get('type') == 'refresh'
+                and app.extensions['token_revocations'].is_revoked(jwt_payload['jti']))
+
+    # Built from the database on the first search, then kept current by ProductService;
+    # the change log in the shared store carries renames from the other workers
+    app.extensions['product_search_index'] = ProductSearchIndex()
+    app.extensions['search_changes'] = SearchChangeLog(app.extensions['shared_cache'])
+    app.extensions['stock_reconciler'] = StockReconciler(app, interval=app.config['STOCK_RECONCILE_INTERVAL'])
+    app.extensions['sales_rollup'] = SalesRollupBuffer(
+        app,
+        interval=app.config['SALES_ROLLUP_FLUSH_INTERVAL'],
+        max_pending=app.config['SALES_ROLLUP_MAX_PENDING']
+    )
+    if app.config['ORDER_GROUP_COMMIT']:
+        from app.infrastructure.group_commit import GroupCommitter
+        app.extensions['order_group_commit'] = GroupCommitter(
+            window=app.config['ORDER_GROUP_COMMIT_WINDOW_MS'] / 1000,
+            max_batch=app.config['ORDER_GROUP_COMMIT_MAX']
+        )
+    if app.config['ORDER_INTAKE_MODE'] == 'async':
+        from app.application.order_intake import OrderIntake
+        # Workers start with the first queued order and pick up any left over
+        app.extensions['order_intake'] = OrderIntake(
+            app,
+            maxsize=app.config['ORDER_QUEUE_SIZE'],
+            workers=app.config['ORDER_WORKERS'],
+            batch_size=app.config['ORDER_BATCH_SIZE']
+        )
 
     # Initialize Flask-RESTX Api
     api = Api(app, version='1.0', title='E-Commerce API',
               description='API documentation for the E-Commerce platform',
               doc='/docs')
 
-    from app.presentation import auth_controller, product_controller, order_controller, cart_controller
+    from app.presentation import auth_controller, product_controller, order_controller, cart_controller, report_controller
     # Register blueprints as before (for backward compatibility)
     app.register_blueprint(auth_controller.bp)
     app.register_blueprint(product_controller.bp)
@@ -48,5 +147,11 @@ def create_app():
         api.add_namespace(order_controller.api)
     if hasattr(cart_controller, 'api'):
         api.add_namespace(cart_controller.api)
+    api.add_namespace(report_controller.api)
+
+    from app.presentation import cli
+    app.cli.add_command(cli.import_products)
+    app.cli.add_command(cli.backfill_sales_rollups)
+    app.cli.add_command(cli.benchmark_password_hash)
 
     return app
@@ -1,10 +1,32 @@
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from flask import current_app
 from app.domain.user import User
+from app.dtos.exceptions import UnauthorizedException
+from app.infrastructure.password_hasher import PasswordHasher
+from app.infrastructure.token_revocation import TokenRevocationList
 from app.infrastructure.user_repository import UserRepository
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, create_refresh_token
 
 class AuthService:
-    def __init__(self):
+    def __init__(self, hasher: Optional[PasswordHasher] = None, revocations: Optional[TokenRevocationList] = None):
         self.user_repo = UserRepository()
+        self._hasher = hasher
+        self._revocations = revocations
+
+    @property
+    def hasher(self) -> PasswordHasher:
+        if self._hasher is not None:
+            return self._hasher
+        return current_app.extensions['password_hasher']
+
+    @property
+    def revocations(self) -> TokenRevocationList:
+        if self._revocations is not None:
+            return self._revocations
+        return current_app.extensions['token_revocations']
 
     def register_user(self, username, email, password, role='customer'):
         if not self._is_valid_email(email):
@@ -12,15 +34,52 @@ class AuthService:
         if self.user_repo.find_user_by_email(email):
             raise ValueError("Email already exists")
         user = User(username=username, email=email, role=role)
-        user.set_password(password)
+        user.password_hash = self.hasher.hash(password)
         return self.user_repo.save_user(user)
 
     def login_user(self, email, password):
         user = self.user_repo.find_user_by_email(email)
-        if user and user.check_password(password):
-                return create_access_token(identity={'id': user.id, 'role': user.role})
+        if user and self.hasher.verify(user.password_hash, password):
+                if self.hasher.needs_rehash(user.password_hash):
+                    rehasher = current_app.extensions.get('password_rehasher')
+                    if rehasher is not None:
+                        rehasher.submit(user.id, user.password_hash, password)
+                return self._issue_tokens(user, int(time.time()))
         raise ValueError("Invalid credentials")
 
+    def refresh_tokens(self, identity: str, claims: Dict[str, Any]) -> Dict[str, str]:
+        """Rotate a refresh token: revoke it and issue a new access/refresh pair.
+
+        Renewing needs no password check, only a primary key lookup so the
+        new tokens carry the user's current role and a deleted user is
+        refused. Each refresh token works once, and the login time travels
+        with the rotated tokens so no session outlives JWT_SESSION_MAX_AGE.
+        """
+        auth_time = claims.get('auth_time')
+        if not isinstance(auth_time, int) or self._session_remaining(auth_time) <= 0:
+            raise UnauthorizedException("Session has expired, please log in again")
+        user = self.user_repo.find_user_by_id(int(identity))
+        if user is None:
+            raise UnauthorizedException("User no longer exists")
+        if not self.revocations.revoke(claims['jti'], claims['exp']):
+            raise UnauthorizedException("Refresh token has already been used")
+        return self._issue_tokens(user, auth_time)
+
+    def _issue_tokens(self, user: User, auth_time: int) -> Dict[str, str]:
+        claims = {'role': user.role, 'auth_time': auth_time}
+        refresh_expires = min(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'],
+                              timedelta(seconds=self._session_remaining(auth_time)))
+        return {
+            'access_token': create_access_token(identity=str(user.id), additional_claims=claims),
+            'refresh_token': create_refresh_token(
+                identity=str(user.id), additional_claims=claims, expires_delta=refresh_expires
+            ),
+        }
+
+    @staticmethod
+    def _session_remaining(auth_time: int) -> float:
+        return auth_time + current_app.config['JWT_SESSION_MAX_AGE'].total_seconds() - time.time()
+
     def _is_valid_email(self, email):
         import re
         pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
@@ -0,0 +1,42 @@
+from typing import Any, Dict, Optional
+
+from app.domain.cart import Cart
+from app.infrastructure.product_repository import ProductRepository
+from app.infrastructure.sales_rollup_repository import to_cents
+
+
+class CartService:
+    def __init__(self, product_repo: Optional[ProductRepository] = None):
+        self.product_repo = product_repo or ProductRepository()
+
+    def price_cart(self, cart: Cart) -> Dict[str, Any]:
+        """Price every line of ``cart`` with one product lookup and exact decimal totals.
+
+        Prices and stock come from the product cache or, for products not
+        cached, one IN query. Lines for products that no longer exist are
+        returned unpriced and left out of the subtotal. Stock of sharded
+        products is the last reconciled total, so ``in_stock`` is advisory;
+        checkout still reserves for real.
+        """
+        states = self.product_repo.find_product_states(list({item.product_id for item in cart.items}))
+        lines = []
+        subtotal = to_cents(0)
+        for item in cart.items:
+            state = states.get(item.product_id)
+            line = {'item': item, 'name': None, 'unit_price': None, 'line_total': None, 'in_stock': False}
+            if state is not None:
+                unit_price = to_cents(state['price'])
+                line.update(
+                    name=state['name'],
+                    unit_price=unit_price,
+                    line_total=unit_price * item.quantity,
+                    in_stock=state['stock'] >= item.quantity
+                )
+                subtotal += line['line_total']
+            lines.append(line)
+        return {
+            'lines': lines,
+            'subtotal': subtotal,
+            'units': sum(item.quantity for item in cart.items),
+            'all_in_stock': all(line['in_stock'] for line in lines),
+        }
@@ -0,0 +1,169 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.infrastructure.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class OrderIntake:
+    """Bounded queue of order ids drained in batches by a small worker pool.
+
+    Requests insert a 'queued' order row and hand its id to ``submit``; the
+    workers confirm or reject whole batches through
+    ``OrderService.process_queued_orders`` so request threads never wait on
+    stock row locks. The database row is the source of truth: on start the
+    workers pick up any order still 'queued' from a previous process.
+    """
+
+    RETRY_DELAY = 0.05
+
+    def __init__(self, app, maxsize: int = 10000, workers: int = 4, batch_size: int = 100,
+                 batch_wait: float = 0.005):
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._waiters: Dict[int, threading.Event] = {}
+        self._enqueued_at: Dict[int, float] = {}
+        self._stopping = threading.Event()
+        self.latency = LatencyStats()
+        self.batch_latency = LatencyStats()
+        self.confirmed = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+    def submit(self, order_id: int) -> bool:
+        """Queue ``order_id``; returns False when the queue is full."""
+        with self._lock:
+            self._waiters[order_id] = threading.Event()
+            self._enqueued_at[order_id] = time.monotonic()
+        self.start()
+        try:
+            self._queue.put_nowait(order_id)
+        except queue.Full:
+            self._forget([order_id])
+            return False
+        return True
+
+    def wait(self, order_id: int, timeout: float) -> None:
+        """Block until ``order_id`` leaves the queue or ``timeout`` passes."""
+        with self._lock:
+            event = self._waiters.get(order_id)
+        if event is not None:
+            event.wait(timeout)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f'order-intake-{n}', daemon=True)
+                for n in range(self.workers)
+            ]
+            # Orders being submitted right now are queued by their own request
+            recovered = [order_id for order_id in self._recover() if order_id not in self._waiters]
+        for thread in self._threads:
+            thread.start()
+        for order_id in recovered:
+            self._queue.put(order_id)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Process whatever is queued, then stop the workers."""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def metrics(self) -> Dict[str, object]:
+        return {
+            'mode': 'async',
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'workers': len(self._threads),
+            'confirmed': self.confirmed,
+            'rejected': self.rejected,
+            'failed_batches': self.failed_batches,
+            'order_latency': self.latency.snapshot(),
+            'batch_latency': self.batch_latency.snapshot(),
+        }
+
+    def _recover(self) -> List[int]:
+        from app.infrastructure.order_repository import OrderRepository
+        with self.app.app_context():
+            return OrderRepository().find_order_ids_by_status('queued')
+
+    def _next_batch(self) -> List[int]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        from app.application.order_service import OrderService
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stopping.is_set():
+                    return
+                continue
+            started = time.monotonic()
+            try:
+                with self.app.app_context():
+                    outcomes = OrderService().process_queued_orders(batch)
+            except Exception:
+                logger.exception("Order intake batch of %d failed", len(batch))
+                with self._lock:
+                    self.failed_batches += 1
+                self._retry(batch)
+                continue
+            finished = time.monotonic()
+            self.batch_latency.observe(finished - started)
+            with self._lock:
+                for status in outcomes.values():
+                    if status == 'confirmed':
+                        self.confirmed += 1
+                    else:
+                        self.rejected += 1
+                for order_id in batch:
+                    enqueued_at = self._enqueued_at.get(order_id)
+                    if enqueued_at is not None:
+                        self.latency.observe(finished - enqueued_at)
+            self._forget(batch)
+
+    def _retry(self, batch: List[int]) -> None:
+        # The orders are still 'queued' in the database; try them again after
+        # a pause, or leave them for recovery on the next start if the queue
+        # has filled up meanwhile
+        time.sleep(self.RETRY_DELAY)
+        for position, order_id in enumerate(batch):
+            try:
+                self._queue.put_nowait(order_id)
+            except queue.Full:
+                self._forget(batch[position:])
+                return
+
+    def _forget(self, order_ids: List[int]) -> None:
+        with self._lock:
+            for order_id in order_ids:
+                self._enqueued_at.pop(order_id, None)
+                event = self._waiters.pop(order_id, None)
+                if event is not None:
+                    event.set()
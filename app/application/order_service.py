@@ -1,22 +1,175 @@
+from flask import current_app
+
+from app.application.pagination import Page, decode_cursor, encode_cursor
 from app.domain.order import Order
+from app.dtos.exceptions import ValidationException
+from app.infrastructure.cart_item_repository import CartItemRepository
+from app.infrastructure.cart_repository import CartRepository
+from app.infrastructure.database import transaction
 from app.infrastructure.order_repository import OrderRepository
 from app.infrastructure.product_repository import ProductRepository
 
+
+class _StockShortage(Exception):
+    pass
+
+
 class OrderService:
     def __init__(self):
         self.order_repo = OrderRepository()
         self.product_repo = ProductRepository()
 
     def place_order(self, user_id, product_id, quantity):
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        committer = current_app.extensions.get('order_group_commit')
+        if committer is not None:
+            # Runs on the group leader's session; the detached order is safe
+            # to hand back to this thread once the shared commit is done
+            order = committer.run(
+                lambda: self.order_repo.detach(self._reserve_and_add(user_id, product_id, quantity))
+            )
+        else:
+            with transaction():
+                order = self._reserve_and_add(user_id, product_id, quantity)
+        self.product_repo.stock_changed([product_id])
+        self._record_sales(order.id, order.created_at, [(product_id, quantity, order.unit_price)])
+        return order
+
+    def enqueue_order(self, user_id, product_id, quantity):
+        """Record an order as 'queued' for the intake workers; stock is not touched yet."""
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
         product = self.product_repo.find_product_by_id(product_id)
         if not product:
             raise ValueError("Product not found")
-        if product.stock < quantity:
-            raise ValueError("Insufficient stock")
-        order = Order(user_id=user_id, product_id=product_id, quantity=quantity)
-        product.stock -= quantity
-        self.product_repo.save_product(product)
-        return self.order_repo.save_order(order)
+        return self.order_repo.save_order(Order(
+            user_id=user_id, product_id=product_id, quantity=quantity, unit_price=product.price, status='queued'
+        ))
+
+    def process_queued_orders(self, order_ids):
+        """Confirm or reject a batch of queued orders in one transaction.
+
+        Orders are handled in product id order so concurrent batches lock
+        product rows in the same order; within a product they keep FIFO order.
+        Orders no longer 'queued' (handled by another worker) are skipped.
+        """
+        outcomes = {}
+        with transaction():
+            # Claim the orders first: another process may hold the same ids
+            # (e.g. after recovery), and the conditional UPDATE lets only one
+            # transaction move each row out of 'queued'. The claim commits
+            # together with the outcome, so 'processing' is never visible.
+            if not self.order_repo.set_status(order_ids, 'processing', expected='queued'):
+                return outcomes
+            rows = sorted(self.order_repo.find_order_rows(order_ids, 'processing'), key=lambda r: (r.product_id, r.id))
+            for row in rows:
+                reserved = self.product_repo.reserve_stock(row.product_id, row.quantity)
+                outcomes[row.id] = 'confirmed' if reserved else 'rejected'
+            for status in ('confirmed', 'rejected'):
+                self.order_repo.set_status(
+                    [i for i, s in outcomes.items() if s == status], status, expected='processing'
+                )
+        confirmed = [row for row in rows if outcomes[row.id] == 'confirmed']
+        self.product_repo.stock_changed(sorted({row.product_id for row in confirmed}))
+        for row in confirmed:
+            self._record_sales(row.id, row.created_at, [(row.product_id, row.quantity, row.unit_price)])
+        return outcomes
+
+    def reject_orders(self, order_ids):
+        with transaction():
+            self.order_repo.set_status(order_ids, 'rejected')
+
+    def get_user_order(self, user_id, order_id, refresh=False):
+        order = self.order_repo.find_order(order_id, refresh=refresh)
+        if not order or str(order.user_id) != str(user_id):
+            raise ValueError("Order not found")
+        return order
+
+    def checkout(self, user_id, lines):
+        """Place one order for several ``(product_id, quantity)`` lines with a single commit."""
+        quantities = {}
+        for product_id, quantity in lines:
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if not quantities:
+            raise ValueError("Cart is empty")
+        try:
+            with transaction():
+                if not self.product_repo.reserve_stock_batch(quantities):
+                    raise _StockShortage()
+                prices = self.product_repo.find_stock_and_prices(list(quantities))
+                order = self.order_repo.add_order(
+                    Order(user_id=user_id, product_id=None, quantity=sum(quantities.values()))
+                )
+                lines = [
+                    (product_id, quantity, prices[product_id][1])
+                    for product_id, quantity in sorted(quantities.items())
+                ]
+                self.order_repo.add_order_items(order.id, [
+                    {'product_id': product_id, 'quantity': quantity, 'unit_price': unit_price}
+                    for product_id, quantity, unit_price in lines
+                ])
+        except _StockShortage:
+            # The partial decrement has been rolled back, so this sees real stock levels
+            raise ValueError(self._shortage_message(quantities))
+        self.product_repo.stock_changed(list(quantities))
+        self._record_sales(order.id, order.created_at, lines)
+        return order
+
+    def checkout_cart(self, user_id, cart_id):
+        cart = CartRepository().get_cart(cart_id)
+        if not cart or str(cart.user_id) != str(user_id):
+            raise ValueError("Cart not found")
+        cart_item_repo = CartItemRepository()
+        items = cart_item_repo.get_items_by_cart(cart_id)
+        order = self.checkout(user_id, [(item.product_id, item.quantity) for item in items])
+        cart_item_repo.clear_cart(cart_id)
+        return order
 
     def get_user_orders(self, user_id):
-        return self.order_repo.find_orders_by_user(user_id)
\ No newline at end of file
+        return self.order_repo.find_orders_by_user(user_id)
+
+    def list_user_orders(self, user_id, limit=50, cursor=None, status=None):
+        before_id = None
+        if cursor:
+            before_id = decode_cursor(cursor).get('i')
+            if not isinstance(before_id, int):
+                raise ValidationException("Invalid cursor")
+        rows = self.order_repo.find_order_rows_page(user_id, limit + 1, before_id=before_id, status=status)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({'i': rows[-1].id})
+        return Page([row._asdict() for row in rows], next_cursor=next_cursor)
+
+    def iter_user_orders(self, user_id):
+        return self.order_repo.iter_order_rows_by_user(user_id)
+
+    def _reserve_and_add(self, user_id, product_id, quantity):
+        # Rejections raise before anything is written, as GroupCommitter expects
+        if not self.product_repo.reserve_stock(product_id, quantity):
+            if not self.product_repo.find_product_by_id(product_id):
+                raise ValueError("Product not found")
+            raise ValueError("Insufficient stock")
+        price = self.product_repo.find_product_states([product_id])[product_id]['price']
+        return self.order_repo.add_order(
+            Order(user_id=user_id, product_id=product_id, quantity=quantity, unit_price=price)
+        )
+
+    def _record_sales(self, order_id, created_at, lines):
+        # Rollups are flushed in batches by SalesRollupBuffer, off the order transaction
+        rollup = current_app.extensions.get('sales_rollup')
+        if rollup is not None and created_at is not None:
+            rollup.record(order_id, created_at.date(), lines)
+
+    def _shortage_message(self, quantities):
+        available = self.product_repo.find_stock_and_prices(list(quantities))
+        missing = sorted(product_id for product_id in quantities if product_id not in available)
+        if missing:
+            return f"Product not found: {', '.join(map(str, missing))}"
+        short = sorted(product_id for product_id, quantity in quantities.items() if available[product_id][0] < quantity)
+        if not short:
+            return "Insufficient stock"
+        return f"Insufficient stock for product(s): {', '.join(map(str, short))}"
\ No newline at end of file
@@ -0,0 +1,28 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+from app.dtos.exceptions import ValidationException
+
+
+class Page:
+    def __init__(self, items: List[Any], next_cursor: Optional[str] = None, total: Optional[int] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except ValueError:
+        raise ValidationException("Invalid cursor")
+    if not isinstance(values, dict):
+        raise ValidationException("Invalid cursor")
+    return values
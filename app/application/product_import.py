@@ -0,0 +1,61 @@
+import csv
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Each reader yields (row number, parsed row) or (row number, parse error message)
+ParsedRow = Tuple[int, Union[Dict[str, Any], str]]
+
+
+class ImportReport:
+    MAX_ERRORS = 1000
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def record_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'processed': self.processed,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[ParsedRow]:
+    for row_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, "Expected a JSON object"
+            continue
+        yield row_number, row
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[ParsedRow]:
+    reader = csv.DictReader(lines)
+    for row_number, row in enumerate(reader, start=1):
+        if None in row:
+            yield row_number, "Too many columns"
+            continue
+        yield row_number, {k: v for k, v in row.items() if v not in (None, '')}
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
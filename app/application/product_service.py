@@ -1,24 +1,142 @@
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from flask import current_app
+from pydantic import TypeAdapter, ValidationError
+
+from app.application.pagination import Page, decode_cursor, encode_cursor
+from app.application.product_import import ImportReport, ParsedRow
 from app.domain.product import Product
 from app.dtos.exceptions import NotFoundException, ValidationException
+from app.dtos.requests.product_requests import ProductCreateRequest
 from app.infrastructure.product_repository import ProductRepository
+from app.infrastructure.search_changes import SearchChangeLog
+from app.infrastructure.search_index import ProductSearchIndex
+
+_product_batch = TypeAdapter(List[ProductCreateRequest])
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# The sort key a cursor carries must have the sort column's type
+_CURSOR_KEY_CHECKS = {
+    'id': lambda key: key is None or _is_int(key),
+    'price': lambda key: _is_int(key) or isinstance(key, float),
+    'name': lambda key: isinstance(key, str),
+}
 
 
 class ProductService:
-    def __init__(self, product_repo: Optional[ProductRepository] = None):
+    def __init__(
+        self,
+        product_repo: Optional[ProductRepository] = None,
+        search_index: Optional[ProductSearchIndex] = None
+    ):
         self.product_repo = product_repo or ProductRepository()
+        self._search_index = search_index
+
+    @property
+    def search_index(self) -> Optional[ProductSearchIndex]:
+        if self._search_index is not None:
+            return self._search_index
+        return current_app.extensions.get('product_search_index')
+
+    @property
+    def search_changes(self) -> Optional[SearchChangeLog]:
+        return current_app.extensions.get('search_changes')
 
     def create_product(self, **product_data) -> Product:
         try:
             product = Product(**product_data)
-            return self.product_repo.save_product(product)
+            product = self.product_repo.save_product(product)
         except Exception as e:
             raise ValidationException(f"Failed to create product: {str(e)}")
+        self._index(product)
+        return product
+
+    def import_products(self, records: Iterable[ParsedRow], chunk_size: int = 1000) -> ImportReport:
+        report = ImportReport()
+        chunk = []
+        for row_number, row in records:
+            report.processed += 1
+            if isinstance(row, str):
+                report.record_error(row_number, row)
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                self._import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, report)
+        if report.imported and self.search_index is not None:
+            # Inserted ids are not known here, so every index rebuilds
+            self.search_index.invalidate()
+            self._search_changed(None)
+        return report
+
+    def bulk_update_products(
+        self,
+        patches: Optional[List[dict]] = None,
+        rule: Optional[dict] = None,
+        batch_size: int = 1000
+    ) -> dict:
+        affected = 0
+        batches = 0
+        if patches:
+            for start in range(0, len(patches), batch_size):
+                affected += self.product_repo.patch_products(patches[start:start + batch_size])
+                batches += 1
+        if rule:
+            filters = rule.get('filters') or {}
+            low, high = self.product_repo.product_id_bounds(**filters)
+            if low is not None:
+                # Walk the primary key in fixed-width ranges so each UPDATE
+                # only locks a bounded slice of the table
+                for start in range(low, high + 1, batch_size):
+                    affected += self.product_repo.adjust_products(
+                        (start, start + batch_size - 1),
+                        price_percent=rule.get('price_percent'),
+                        stock_delta=rule.get('stock_delta'),
+                        **filters
+                    )
+                    batches += 1
+        return {'affected': affected, 'batches': batches}
 
     def get_products(self) -> List[Product]:
         return self.product_repo.find_all_products()
 
+    def list_products(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = 'id',
+        count: str = 'none',
+        **filters
+    ) -> Page:
+        after = self._decode_after(cursor, sort)
+        rows = self.product_repo.find_product_rows_page(limit + 1, sort=sort, after=after, **filters)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor({'s': sort, 'k': getattr(last, sort), 'i': last.id})
+
+        total = None
+        if count == 'estimate' and not any(filters.values()):
+            total = self.product_repo.estimate_product_count()
+        if count != 'none' and total is None:
+            total = self.product_repo.count_products(**filters)
+        return Page(rows, next_cursor=next_cursor, total=total)
+
+    def get_products_by_ids(self, product_ids: List[int]) -> Tuple[List[dict], List[int]]:
+        """Products in request order, plus the requested ids that do not exist."""
+        unique_ids = list(dict.fromkeys(product_ids))
+        states = self.product_repo.find_product_states(unique_ids)
+        found = [states[product_id] for product_id in unique_ids if product_id in states]
+        missing = [product_id for product_id in unique_ids if product_id not in states]
+        return found, missing
+
     def get_product_by_id(self, product_id: int) -> Product:
         product = self.product_repo.find_product_by_id(product_id)
         if not product:
@@ -27,16 +145,100 @@ class ProductService:
 
     def update_product(self, product_id: int, **update_data) -> Product:
         product = self.get_product_by_id(product_id)
-        
+        renamed = 'name' in update_data and update_data['name'] != product.name
+        # Sharded stock lives in the shard rows, so a new level is redistributed there
+        shard_stock = update_data.pop('stock', None) if product.stock_shards else None
+
         try:
             for key, value in update_data.items():
                 if hasattr(product, key):
                     setattr(product, key, value)
             
-            return self.product_repo.save_product(product)
+            product = self.product_repo.save_product(product)
+            if shard_stock is not None:
+                self.product_repo.shard_stock(product_id, product.stock_shards, stock=shard_stock)
         except Exception as e:
             raise ValidationException(f"Failed to update product: {str(e)}")
+        if renamed:
+            self._index(product)
+        return product
+
+    def set_stock_shards(self, product_id: int, shards: int) -> dict:
+        """Turn hot-product stock sharding on (``shards`` > 0), resize it, or turn it off."""
+        self.get_product_by_id(product_id)
+        stock = self.product_repo.shard_stock(product_id, shards)
+        return {'product_id': product_id, 'shards': shards, 'stock': stock}
     
     def delete_product(self, product_id: int) -> bool:
         product = self.get_product_by_id(product_id)
-        return self.product_repo.delete_product(product)
\ No newline at end of file
+        deleted = self.product_repo.delete_product(product)
+        if deleted and self.search_index is not None:
+            self.search_index.remove(product_id)
+            self._search_changed([product_id])
+        return deleted
+
+    def iter_products(self, cursor: Optional[str] = None, sort: str = 'id', **filters) -> Iterator[dict]:
+        after = self._decode_after(cursor, sort)
+        return self.product_repo.iter_product_rows(sort=sort, after=after, **filters)
+
+    def search_products(self, query: str, limit: int = 20) -> Tuple[List[Product], int]:
+        index = self.search_index
+        changes = self.search_changes
+        if changes is None:
+            index.ensure_built(self.product_repo.iter_search_documents)
+        else:
+            index.refresh(
+                changes.since,
+                self.product_repo.iter_search_documents,
+                lambda product_ids: self.product_repo.iter_search_documents(product_ids=product_ids)
+            )
+        ranked, total = index.search(query, limit)
+        products = {p.id: p for p in self.product_repo.find_products_by_ids([doc_id for doc_id, _ in ranked])}
+        return [products[doc_id] for doc_id, _ in ranked if doc_id in products], total
+
+    @staticmethod
+    def _decode_after(cursor: Optional[str], sort: str) -> Optional[Tuple[object, int]]:
+        if not cursor:
+            return None
+        values = decode_cursor(cursor)
+        if values.get('s') != sort or not _is_int(values.get('i')):
+            raise ValidationException("Cursor does not match the requested sort")
+        key = values.get('k')
+        if not _CURSOR_KEY_CHECKS[sort](key):
+            raise ValidationException("Invalid cursor")
+        return key, values['i']
+
+    def _import_chunk(self, chunk: List[Tuple[int, dict]], report: ImportReport) -> None:
+        try:
+            validated = _product_batch.validate_python([row for _, row in chunk])
+        except ValidationError as e:
+            invalid = {}
+            for error in e.errors():
+                field = '.'.join(str(part) for part in error['loc'][1:])
+                invalid.setdefault(error['loc'][0], f"{field}: {error['msg']}")
+            for position in sorted(invalid):
+                report.record_error(chunk[position][0], invalid[position])
+            chunk = [entry for position, entry in enumerate(chunk) if position not in invalid]
+            validated = _product_batch.validate_python([row for _, row in chunk])
+        if not validated:
+            return
+        try:
+            self.product_repo.insert_products([product.model_dump() for product in validated])
+        except Exception as e:
+            for row_number, _ in chunk:
+                report.record_error(row_number, f"Failed to insert: {str(e)}")
+            return
+        report.imported += len(validated)
+
+    def _index(self, product: Product) -> None:
+        index = self.search_index
+        if index is not None:
+            index.add(product.id, product.name)
+            self._search_changed([product.id])
+
+    def _search_changed(self, product_ids: Optional[List[int]]) -> None:
+        changes = self.search_changes
+        if changes is not None:
+            previous, version = changes.record(product_ids)
+            if product_ids is not None:
+                self.search_index.advance(previous, version)
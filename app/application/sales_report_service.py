@@ -0,0 +1,76 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
+from app.infrastructure.order_repository import OrderRepository
+from app.infrastructure.sales_rollup_repository import SalesRollupRepository, to_cents
+
+# Statuses of orders that never took stock. Every other order was counted as a
+# sale when it was placed, whatever status it has moved on to since
+NON_SALE_STATUSES = ['queued', 'processing', 'rejected']
+
+
+class SalesReportService:
+    def __init__(self):
+        self.rollup_repo = SalesRollupRepository()
+        self.order_repo = OrderRepository()
+
+    def daily_sales(self, start: date, end: date) -> List[Dict[str, Any]]:
+        return [self._serialize(row) for row in self.rollup_repo.find_daily(start, end)]
+
+    def product_sales(
+        self,
+        start: date,
+        end: date,
+        product_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        rows = self.rollup_repo.find_product_daily(start, end, product_id=product_id, limit=limit)
+        return [self._serialize(row) for row in rows]
+
+    def rebuild_rollups(self, chunk_size: int = 10000) -> Dict[str, int]:
+        """Recompute the rollups from the orders table in order id chunks.
+
+        Each chunk of ``chunk_size`` order ids is read, aggregated and added
+        in its own transaction, so memory stays flat however long the order
+        history is. Orders up to the newest id at the start are counted;
+        later ones are added by the live rollup buffer instead, which takes
+        the starting point under its own lock. Buffers in other processes
+        are not rebased, so run this when they are idle to avoid counting
+        their pending orders twice.
+        """
+        def begin():
+            self.rollup_repo.clear()
+            return self.order_repo.order_id_bounds()
+
+        buffer = current_app.extensions.get('sales_rollup')
+        low, high = buffer.rebase(begin) if buffer is not None else begin()
+        summary = {'orders': 0, 'lines': 0, 'chunks': 0}
+        if low is None:
+            return summary
+        for start in range(low, high + 1, chunk_size):
+            lines = self.order_repo.find_sales_lines(NON_SALE_STATUSES, (start, min(start + chunk_size - 1, high)))
+            if not lines:
+                continue
+            products, days = {}, {}
+            for order_id, created_at, product_id, quantity, unit_price in lines:
+                revenue = to_cents(unit_price or 0) * quantity
+                counters = products.setdefault((created_at.date(), product_id), [0, to_cents(0)])
+                counters[0] += quantity
+                counters[1] += revenue
+                totals = days.setdefault(created_at.date(), [0, 0, to_cents(0)])
+                totals[1] += quantity
+                totals[2] += revenue
+            for order_id, created_at in {(line[0], line[1]) for line in lines}:
+                days[created_at.date()][0] += 1
+            self.rollup_repo.add(products, days)
+            summary['orders'] += len({line[0] for line in lines})
+            summary['lines'] += len(lines)
+            summary['chunks'] += 1
+        return summary
+
+    @staticmethod
+    def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+        # Revenue stays an exact decimal string; days are ISO dates
+        return dict(row, day=row['day'].isoformat(), revenue=str(to_cents(row['revenue'])))
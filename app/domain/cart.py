@@ -1,7 +1,8 @@
 class Cart:
-    def __init__(self, id: int, user_id: int):
+    def __init__(self, user_id: int, id: int = None, version: int = 0):
         self.id = id
         self.user_id = user_id
+        self.version = version
         self.items = []
 
     def get_items(self):
@@ -1,13 +1,6 @@
-from app import db
-
-class CartItem(db.Model):
-    __tablename__ = 'cart_items'
-    id = db.Column(db.Integer, primary_key=True)
-    cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
-    quantity = db.Column(db.Integer, nullable=False)
-
-    def __init__(self, cart_id, product_id, quantity):
+class CartItem:
+    def __init__(self, cart_id, product_id, quantity, id=None):
+        self.id = id
         self.cart_id = cart_id
         self.product_id = product_id
         self.quantity = quantity
@@ -1,11 +1,23 @@
+from datetime import datetime, timezone
+
 from app import db
+from app.domain.order_item import OrderItem  # noqa: F401 (registers the items relationship target)
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_id_id', 'user_id', 'id'),
+        db.Index('ix_orders_user_id_status', 'user_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    # Set for single-product orders; checkout orders keep their lines in order_items
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True)
     quantity = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), nullable=False, default='pending')
+    # Null on orders placed before these columns existed
+    created_at = db.Column(db.DateTime, nullable=True, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    unit_price = db.Column(db.Float, nullable=True)
     user = db.relationship('User', backref='orders')
     product = db.relationship('Product', backref='orders')
+    items = db.relationship('OrderItem', backref='order')
\ No newline at end of file
@@ -1,8 +1,16 @@
 from app import db
+from app.domain.product_stock_shard import ProductStockShard  # noqa: F401 (registers the shard table)
 
 class Product(db.Model):
     __tablename__ = 'product'
+    __table_args__ = (
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_name_id', 'name', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
-    stock = db.Column(db.Integer, nullable=False)
\ No newline at end of file
+    stock = db.Column(db.Integer, nullable=False)
+    # Hot products keep their stock in this many product_stock_shards rows;
+    # stock then holds the reconciled total
+    stock_shards = db.Column(db.Integer, nullable=False, default=0, server_default='0')
\ No newline at end of file
@@ -0,0 +1,8 @@
+from app import db
+
+class ProductStockShard(db.Model):
+    """One slice of a hot product's stock; orders decrement a single shard row."""
+    __tablename__ = 'product_stock_shards'
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
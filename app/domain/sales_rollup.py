@@ -0,0 +1,21 @@
+from app import db
+
+class DailySales(db.Model):
+    """Orders, units and revenue per UTC day, kept current as orders are placed."""
+    __tablename__ = 'sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class DailyProductSales(db.Model):
+    """Units and revenue per product per UTC day."""
+    __tablename__ = 'sales_daily_product'
+    __table_args__ = (
+        db.Index('ix_sales_daily_product_product_id_day', 'product_id', 'day'),
+    )
+    day = db.Column(db.Date, primary_key=True)
+    # No foreign key: sales history outlives deleted products
+    product_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
@@ -45,4 +45,21 @@ class ForbiddenException(AppException):
             message=message,
             status_code=HTTPStatus.FORBIDDEN,
             **kwargs
+        )
+
+class ConflictException(AppException):
+    def __init__(self, message: str = "Conflict", **kwargs):
+        super().__init__(
+            message=message,
+            status_code=HTTPStatus.CONFLICT,
+            **kwargs
+        )
+
+class ServiceUnavailableException(AppException):
+    def __init__(self, message: str = "Service temporarily unavailable", retry_after: int = 1, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(
+            message=message,
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            **kwargs
         )
\ No newline at end of file
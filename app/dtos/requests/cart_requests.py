@@ -1,3 +1,8 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
 class CreateCartRequest:
     def __init__(self, user_id: int):
         self.user_id = user_id
@@ -13,3 +18,19 @@ class RemoveCartItemRequest:
         self.cart_id = cart_id
         self.product_id = product_id
 
+
+class CartItemOperation(BaseModel):
+    op: Literal['add', 'set', 'remove']
+    product_id: int
+    quantity: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode='after')
+    def validate_quantity(self):
+        if self.op == 'add' and (self.quantity is None or self.quantity < 1):
+            raise ValueError('add needs a quantity of at least 1')
+        if self.op == 'set' and self.quantity is None:
+            raise ValueError('set needs a quantity')
+        return self
+
+class CartItemBatchRequest(BaseModel):
+    operations: List[CartItemOperation] = Field(..., min_length=1, max_length=500)
@@ -0,0 +1,10 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class OrderListQuery(BaseModel):
+    limit: int = Field(50, ge=1, le=200)
+    cursor: Optional[str] = None
+    status: Optional[str] = Field(None, min_length=1, max_length=20)
+    stream: Optional[Literal['json', 'ndjson']] = None
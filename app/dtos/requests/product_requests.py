@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class ProductBase(BaseModel):
@@ -22,3 +22,70 @@ class ProductUpdateRequest(ProductBase):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     price: Optional[float] = Field(None, gt=0)
     stock: Optional[int] = Field(None, ge=0)
+
+class ProductListQuery(BaseModel):
+    limit: int = Field(50, ge=1, le=200)
+    cursor: Optional[str] = None
+    sort: Literal['id', 'price', 'name'] = 'id'
+    count: Literal['exact', 'estimate', 'none'] = 'none'
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    in_stock: bool = False
+    name_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+    stream: Optional[Literal['json', 'ndjson']] = None
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=100)
+
+    @field_validator('ids', mode='before')
+    @classmethod
+    def split_ids(cls, v):
+        if isinstance(v, str):
+            return [part.strip() for part in v.split(',') if part.strip()]
+        return v
+
+class ProductSearchQuery(BaseModel):
+    q: str = Field(..., min_length=1, max_length=100)
+    limit: int = Field(20, ge=1, le=100)
+
+class ProductPatch(BaseModel):
+    id: int
+    price: Optional[float] = Field(None, gt=0)
+    stock: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode='after')
+    def validate_has_changes(self):
+        if self.price is None and self.stock is None:
+            raise ValueError('A patch must set price or stock')
+        return self
+
+class ProductStockShardsRequest(BaseModel):
+    # 0 turns sharding off and folds the stock back into the product row
+    shards: int = Field(..., ge=0, le=64)
+
+class ProductRuleFilters(BaseModel):
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    min_stock: Optional[int] = None
+    max_stock: Optional[int] = None
+    name_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+
+class ProductBulkRule(BaseModel):
+    price_percent: Optional[float] = Field(None, gt=-100)
+    stock_delta: Optional[int] = None
+    filters: ProductRuleFilters = Field(default_factory=ProductRuleFilters)
+
+    @model_validator(mode='after')
+    def validate_has_changes(self):
+        if self.price_percent is None and self.stock_delta is None:
+            raise ValueError('A rule must set price_percent or stock_delta')
+        return self
+
+class ProductBulkUpdateRequest(BaseModel):
+    patches: Optional[List[ProductPatch]] = None
+    rule: Optional[ProductBulkRule] = None
+    batch_size: int = Field(1000, ge=1, le=10000)
+
+    @model_validator(mode='after')
+    def validate_single_mode(self):
+        if (self.patches is None) == (self.rule is None):
+            raise ValueError('Provide either patches or rule')
+        return self
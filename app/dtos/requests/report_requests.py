@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class SalesReportQuery(BaseModel):
+    start: date
+    end: date
+    product_id: Optional[int] = None
+    limit: int = Field(1000, ge=1, le=10000)
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        if self.end < self.start:
+            raise ValueError('end must not be before start')
+        if (self.end - self.start).days > 366:
+            raise ValueError('Reports cover at most 366 days')
+        return self
@@ -1,8 +1,9 @@
 class CartResponse:
-    def __init__(self, id, user_id, items):
+    def __init__(self, id, user_id, items, version=0):
         self.id = id
         self.user_id = user_id
         self.items = items
+        self.version = version
 
 class CartItemResponse:
     def __init__(self, id, cart_id, product_id, quantity):
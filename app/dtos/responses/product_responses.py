@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from typing_extensions import TypedDict
 from datetime import datetime
 
 class ProductResponse(BaseModel):
@@ -13,9 +14,19 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductRow(TypedDict):
+    """Plain-dict twin of ProductResponse used by the column-row fast path."""
+    id: int
+    name: str
+    price: float
+    stock: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
 class ProductListResponse(BaseModel):
     products: list[ProductResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class ProductMessageResponse(BaseModel):
     message: str
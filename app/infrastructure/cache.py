@@ -0,0 +1,182 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheBackend:
+    """Key/value cache interface used by the repositories.
+
+    ``get`` returns ``None`` on a miss, so ``None`` itself cannot be cached.
+    """
+
+    def get(self, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with an optional per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self._stats.misses += 1
+                self._stats.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats.as_dict(), size=len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache(CacheBackend):
+    """Local stand-in for a shared cache server such as Redis or Memcached.
+
+    Values are pickled on the way in, like they would be over the wire, so
+    callers never share mutable objects through the cache. A production
+    deployment replaces this with a client implementing the same interface.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                self._stats.evictions += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+        return pickle.loads(entry[0])
+
+    def set(self, key, value, ttl=None):
+        payload = pickle.dumps(value)
+        with self._lock:
+            self._entries[key] = (payload, self._clock() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats.as_dict(), size=len(self._entries))
+
+
+class TieredCache(CacheBackend):
+    """A small local LRU in front of a shared cache.
+
+    Deletes only reach the local tier of the current process, so the local
+    TTL bounds how long other processes may serve a stale entry.
+    """
+
+    def __init__(self, local: CacheBackend, shared: CacheBackend, shared_ttl: Optional[float] = None):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, ttl)
+        self.shared.set(key, value, ttl if ttl is not None else self.shared_ttl)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def stats(self):
+        return {'local': self.local.stats(), 'shared': self.shared.stats()}
+
+
+def build_cache(maxsize: int, ttl: Optional[float], backend: str = 'local',
+                shared: Optional[CacheBackend] = None) -> CacheBackend:
+    if backend == 'local':
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'shared':
+        # Keep the local tier short-lived so cross-process staleness stays bounded
+        local_ttl = min(ttl, 5.0) if ttl else 5.0
+        return TieredCache(LRUCache(maxsize=maxsize, ttl=local_ttl), shared or SharedCache(), shared_ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,20 +1,103 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
 from app.domain.cart_item import CartItem
-from app import db
+from app.domain.cart import Cart
+from app.infrastructure.cart_repository import to_cart, to_items
+from app.infrastructure.cart_store import CartStore, Unchanged
 
 class CartItemRepository:
+    """Cart lines, stored inside their cart; every mutation is one atomic store update."""
+
+    def __init__(self, store: Optional[CartStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> CartStore:
+        if self._store is not None:
+            return self._store
+        return current_app.extensions['cart_store']
+
     def add_cart_item(self, cart_item: CartItem):
-        db.session.add(cart_item)
-        db.session.commit()
+        result = self.upsert_cart_item(cart_item.cart_id, cart_item.product_id, cart_item.quantity)
+        if result is None:
+            return None
+        line, _ = result
+        cart_item.id, cart_item.quantity = line.id, line.quantity
         return cart_item
 
-    def get_cart_item(self, cart_item_id: int):
-        return CartItem.query.get(cart_item_id)
+    def upsert_cart_item(self, cart_id: int, product_id: int, quantity: int) -> Optional[Tuple[CartItem, int]]:
+        """Add ``quantity`` to the product's line, creating it if needed.
+
+        Returns the resulting line and the new cart version, or None when
+        the cart does not exist.
+        """
+        def upsert(cart):
+            line = _line(cart, product_id)
+            line['quantity'] += quantity
+            return CartItem(cart_id, product_id, line['quantity'], id=line['id']), cart['version']
+        try:
+            return self.store.update(cart_id, upsert)
+        except KeyError:
+            return None
 
-    def remove_cart_item(self, cart_item_id: int):
-        cart_item = CartItem.query.get(cart_item_id)
-        if cart_item:
-            db.session.delete(cart_item)
-            db.session.commit()
+    def apply_operations(self, cart_id: int, operations: List[Dict[str, Any]]) -> Optional[Cart]:
+        """Apply ``{op, product_id, quantity}`` operations in order as one update.
+
+        ``add`` merges into the product's line, ``set`` replaces its quantity
+        (0 removes it) and ``remove`` drops it. Either every operation is
+        applied or, if the cart does not exist, none; returns the cart as
+        written, or None.
+        """
+        def apply(cart):
+            for operation in operations:
+                product_id = operation['product_id']
+                if operation['op'] == 'remove' or (operation['op'] == 'set' and not operation['quantity']):
+                    cart['items'] = [item for item in cart['items'] if item['product_id'] != product_id]
+                elif operation['op'] == 'set':
+                    _line(cart, product_id)['quantity'] = operation['quantity']
+                else:
+                    _line(cart, product_id)['quantity'] += operation['quantity']
+            return to_cart(cart)
+        try:
+            return self.store.update(cart_id, apply)
+        except KeyError:
+            return None
+
+    def get_cart_item(self, cart_id: int, cart_item_id: int):
+        return next((item for item in self.get_items_by_cart(cart_id) if item.id == cart_item_id), None)
+
+    def remove_cart_item(self, cart_id: int, cart_item_id: int) -> Optional[int]:
+        """Remove a line; returns the cart version afterwards, or None when the cart does not exist."""
+        def remove(cart):
+            kept = [item for item in cart['items'] if item['id'] != cart_item_id]
+            if len(kept) == len(cart['items']):
+                raise Unchanged(cart['version'] - 1)
+            cart['items'] = kept
+            return cart['version']
+        try:
+            return self.store.update(cart_id, remove)
+        except KeyError:
+            return None
 
     def get_items_by_cart(self, cart_id: int):
-        return CartItem.query.filter_by(cart_id=cart_id).all()
+        state = self.store.get(cart_id)
+        return to_items(cart_id, state['items']) if state is not None else []
+
+    def clear_cart(self, cart_id: int):
+        def clear(cart):
+            cart['items'] = []
+        try:
+            self.store.update(cart_id, clear)
+        except KeyError:
+            pass
+
+def _line(cart: Dict[str, Any], product_id: int) -> Dict[str, Any]:
+    """The cart's line for ``product_id``, appended with quantity 0 if missing."""
+    line = next((item for item in cart['items'] if item['product_id'] == product_id), None)
+    if line is None:
+        line = {'id': cart['next_item_id'], 'product_id': product_id, 'quantity': 0}
+        cart['next_item_id'] += 1
+        cart['items'].append(line)
+    return line
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from app.infrastructure.cart_store import CartStore
+
+logger = logging.getLogger(__name__)
+
+
+class CartReaper:
+    """Deletes carts left idle for longer than the store's TTL.
+
+    Expired carts are otherwise only dropped when someone touches them, so
+    abandoned ones pile up. A background thread, started by the app's first
+    request outside testing mode, runs a pass every ``interval`` seconds. A pass deletes at most
+    ``batch_size`` carts per store call and sleeps ``pause`` seconds between
+    calls, so request threads never wait long for the store lock.
+    """
+
+    def __init__(self, store: CartStore, interval: float = 300, batch_size: int = 500, pause: float = 0.01):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._lock = threading.Lock()
+        self._thread = None
+        self.runs = 0
+        self.reclaimed = 0
+        self.last_run: Dict[str, Any] = {}
+
+    def start(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='cart-reaper', daemon=True)
+                    self._thread.start()
+
+    def reap(self) -> Dict[str, Any]:
+        """Run one pass; returns ``{'reclaimed', 'batches', 'seconds'}`` for it."""
+        started = time.monotonic()
+        reclaimed = batches = 0
+        while True:
+            deleted = self.store.reap(self.batch_size)
+            reclaimed += deleted
+            batches += 1
+            if deleted < self.batch_size:
+                break
+            time.sleep(self.pause)
+        self.last_run = {'reclaimed': reclaimed, 'batches': batches, 'seconds': round(time.monotonic() - started, 3)}
+        self.runs += 1
+        self.reclaimed += reclaimed
+        if reclaimed:
+            logger.info("Reaped %d abandoned carts in %d batches", reclaimed, batches)
+        return self.last_run
+
+    def stats(self) -> Dict[str, Any]:
+        return {'runs': self.runs, 'reclaimed': self.reclaimed, 'last_run': self.last_run}
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reap()
+            except Exception:
+                logger.exception("Cart reaping failed")
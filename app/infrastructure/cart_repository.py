@@ -1,20 +1,41 @@
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
 from app.domain.cart import Cart
-from app import db
+from app.domain.cart_item import CartItem
+from app.infrastructure.cart_store import CartStore
 
 class CartRepository:
+    def __init__(self, store: Optional[CartStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> CartStore:
+        if self._store is not None:
+            return self._store
+        return current_app.extensions['cart_store']
+
     def add_cart(self, cart: Cart):
-        db.session.add(cart)
-        db.session.commit()
+        state = self.store.create(cart.user_id)
+        cart.id = state['id']
+        cart.version = state['version']
         return cart
 
     def get_cart(self, cart_id: int):
-        return Cart.query.get(cart_id)
+        state = self.store.get(cart_id)
+        return to_cart(state) if state is not None else None
 
     def remove_cart(self, cart_id: int):
-        cart = Cart.query.get(cart_id)
-        if cart:
-            db.session.delete(cart)
-            db.session.commit()
+        self.store.delete(cart_id)
 
     def get_carts_by_user(self, user_id: int):
-        return Cart.query.filter_by(user_id=user_id).all()
+        return [to_cart(state) for state in self.store.find_by_user(user_id)]
+
+def to_cart(state: Dict[str, Any]) -> Cart:
+    cart = Cart(user_id=state['user_id'], id=state['id'], version=state['version'])
+    cart.items = to_items(state['id'], state['items'])
+    return cart
+
+def to_items(cart_id: int, items: List[Dict[str, Any]]) -> List[CartItem]:
+    return [CartItem(cart_id, item['product_id'], item['quantity'], id=item['id']) for item in items]
@@ -0,0 +1,354 @@
+import copy
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from app.infrastructure.cache import CacheBackend, SharedCache
+
+
+class Unchanged(Exception):
+    """Raised by an ``update`` mutation to skip saving; ``update`` returns ``result``."""
+
+    def __init__(self, result: Any = None):
+        super().__init__()
+        self.result = result
+
+
+class CartStore:
+    """Storage engine for carts, keyed by cart id.
+
+    A cart is a plain dict: ``{'id', 'user_id', 'items', 'next_item_id',
+    'version'}`` where each item is ``{'id', 'product_id', 'quantity'}``.
+    Callers always get copies. ``update`` runs ``mutate`` on a copy of the
+    stored cart and saves it only if ``mutate`` returns normally, so a
+    mutation that raises leaves the cart as it was. ``version`` goes up by
+    one on every saved update; ``mutate`` already sees the new number, and
+    can raise ``Unchanged`` to return a result without saving anything.
+
+    Carts that are not written for ``ttl`` seconds expire.
+    """
+
+    def create(self, user_id: int) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get(self, cart_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def update(self, cart_id: int, mutate: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply ``mutate`` atomically and return its result; KeyError if the cart is gone."""
+        raise NotImplementedError
+
+    def delete(self, cart_id: int) -> None:
+        raise NotImplementedError
+
+    def find_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def reap(self, limit: int) -> int:
+        """Delete up to ``limit`` expired carts; returns how many were deleted."""
+        raise NotImplementedError
+
+
+def new_cart(cart_id: int, user_id: int) -> Dict[str, Any]:
+    return {'id': cart_id, 'user_id': user_id, 'items': [], 'next_item_id': 1, 'version': 0}
+
+
+class CartLog:
+    """Append-only log of cart writes plus a periodic snapshot, for restart recovery.
+
+    Each write appends one JSON line holding the whole cart (carts are
+    small), so replay is last-write-wins. Every ``snapshot_every`` records
+    the store writes a snapshot of all live carts and the log starts over.
+    With ``fsync`` off a crash can lose the writes still in the OS buffers.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, snapshot_every: int = 10000):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.records = 0
+        self._file = None
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        """Snapshot records, then log records, skipping a torn last line."""
+        for path in (self.snapshot_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        break
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Write one record; returns True when a snapshot is due."""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += 1
+        return self.records >= self.snapshot_every
+
+    def snapshot(self, records: Iterable[Dict[str, Any]]) -> None:
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Everything in the log is now in the snapshot
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self.records = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class InMemoryCartStore(CartStore):
+    """Carts in a process-local LRU map with idle expiry and an optional CartLog.
+
+    At most ``maxsize`` carts are kept; expired carts make room first,
+    then the least recently used one is evicted. Reads and writes both
+    count as use, but only writes reset the expiry clock that survives a
+    restart. A second map in write order finds expired carts without
+    scanning live ones.
+    """
+
+    def __init__(self, ttl: float = 604800, maxsize: int = 100000, log: Optional[CartLog] = None,
+                 clock=time.time):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.log = log
+        self._clock = clock
+        self._carts: OrderedDict = OrderedDict()
+        self._touched: OrderedDict = OrderedDict()
+        self._by_user: Dict[Any, Set[int]] = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+        if log is not None:
+            self._replay(log.load())
+
+    def create(self, user_id):
+        with self._lock:
+            cart = new_cart(self._next_id, user_id)
+            self._next_id += 1
+            self._save(cart)
+            return copy.deepcopy(cart)
+
+    def get(self, cart_id):
+        with self._lock:
+            entry = self._live_entry(cart_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._carts.move_to_end(cart_id)
+            return copy.deepcopy(entry[0])
+
+    def update(self, cart_id, mutate):
+        with self._lock:
+            entry = self._live_entry(cart_id)
+            if entry is None:
+                raise KeyError(cart_id)
+            cart = copy.deepcopy(entry[0])
+            cart['version'] += 1
+            try:
+                result = mutate(cart)
+            except Unchanged as e:
+                return e.result
+            self._save(cart)
+            return result
+
+    def delete(self, cart_id):
+        with self._lock:
+            self._delete(cart_id)
+
+    def find_by_user(self, user_id):
+        with self._lock:
+            carts = [self.get(cart_id) for cart_id in sorted(self._by_user.get(user_id, ()))]
+            return [cart for cart in carts if cart is not None]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, carts=len(self._carts))
+            if self.log is not None:
+                stats['log_records'] = self.log.records
+            return stats
+
+    def reap(self, limit):
+        with self._lock:
+            return self._expire(limit)
+
+    def __len__(self):
+        return len(self._carts)
+
+    def _live_entry(self, cart_id):
+        entry = self._carts.get(cart_id)
+        if entry is not None and entry[1] <= self._clock() - self.ttl:
+            self._delete(cart_id)
+            self._stats['expired'] += 1
+            return None
+        return entry
+
+    def _save(self, cart, touched_at=None, log=True):
+        touched_at = self._clock() if touched_at is None else touched_at
+        self._carts[cart['id']] = (cart, touched_at)
+        self._carts.move_to_end(cart['id'])
+        self._touched[cart['id']] = touched_at
+        self._touched.move_to_end(cart['id'])
+        self._by_user.setdefault(cart['user_id'], set()).add(cart['id'])
+        if log and self.log is not None:
+            self._append({'put': cart, 't': touched_at})
+        self._evict()
+
+    def _evict(self):
+        while len(self._carts) > self.maxsize:
+            if not self._expire(len(self._carts) - self.maxsize):
+                self._delete(next(iter(self._carts)))
+                self._stats['evicted'] += 1
+
+    def _expire(self, limit) -> int:
+        cutoff = self._clock() - self.ttl
+        expired = 0
+        while expired < limit and self._touched:
+            cart_id, touched_at = next(iter(self._touched.items()))
+            if touched_at > cutoff:
+                break
+            self._delete(cart_id)
+            expired += 1
+        self._stats['expired'] += expired
+        return expired
+
+    def _delete(self, cart_id) -> None:
+        # Logged so a restart does not bring expired or evicted carts back
+        if self._drop(cart_id) and self.log is not None:
+            self._append({'del': cart_id})
+
+    def _drop(self, cart_id) -> bool:
+        entry = self._carts.pop(cart_id, None)
+        if entry is None:
+            return False
+        del self._touched[cart_id]
+        user_carts = self._by_user.get(entry[0]['user_id'])
+        if user_carts is not None:
+            user_carts.discard(cart_id)
+            if not user_carts:
+                del self._by_user[entry[0]['user_id']]
+        return True
+
+    def _append(self, record):
+        if self.log.append(record):
+            records = [{'next_id': self._next_id}]
+            # In write order, so replay rebuilds the expiry order too
+            records.extend({'put': self._carts[cart_id][0], 't': touched_at}
+                           for cart_id, touched_at in self._touched.items())
+            self.log.snapshot(records)
+
+    def _replay(self, records):
+        for record in records:
+            if 'put' in record:
+                cart = record['put']
+                self._next_id = max(self._next_id, cart['id'] + 1)
+                self._drop(cart['id'])
+                self._save(cart, touched_at=record['t'], log=False)
+            elif 'del' in record:
+                self._next_id = max(self._next_id, record['del'] + 1)
+                self._drop(record['del'])
+            elif 'next_id' in record:
+                # Ids of carts deleted before the snapshot are never reused
+                self._next_id = max(self._next_id, record['next_id'])
+
+
+class KeyValueCartStore(CartStore):
+    """Carts kept in a shared key/value backend so every worker sees them.
+
+    The backend's TTL does the expiry. Updates are read-modify-write under
+    a process-local lock; a networked backend should make ``update`` a
+    compare-and-set (e.g. Redis WATCH/MULTI) so concurrent workers cannot
+    overwrite each other. Cart ids are random 52-bit integers because the
+    backend interface has no atomic counter.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 604800):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def create(self, user_id):
+        with self._lock:
+            cart_id = secrets.randbits(52)
+            while self.backend.get(self._key(cart_id)) is not None:
+                cart_id = secrets.randbits(52)
+            cart = new_cart(cart_id, user_id)
+            self.backend.set(self._key(cart_id), cart, self.ttl)
+            # Drop ids of carts that have expired or been deleted meanwhile
+            user_key = self._user_key(user_id)
+            live = [i for i in self.backend.get(user_key) or [] if self.backend.get(self._key(i)) is not None]
+            self.backend.set(user_key, live + [cart_id], self.ttl)
+            return cart
+
+    def get(self, cart_id):
+        return self.backend.get(self._key(cart_id))
+
+    def update(self, cart_id, mutate):
+        with self._lock:
+            cart = self.backend.get(self._key(cart_id))
+            if cart is None:
+                raise KeyError(cart_id)
+            cart['version'] += 1
+            try:
+                result = mutate(cart)
+            except Unchanged as e:
+                return e.result
+            self.backend.set(self._key(cart_id), cart, self.ttl)
+            return result
+
+    def delete(self, cart_id):
+        self.backend.delete(self._key(cart_id))
+
+    def find_by_user(self, user_id):
+        carts = [self.get(cart_id) for cart_id in self.backend.get(self._user_key(user_id)) or []]
+        return [cart for cart in carts if cart is not None]
+
+    def stats(self):
+        return self.backend.stats()
+
+    def reap(self, limit):
+        # The backend expires carts itself
+        return 0
+
+    @staticmethod
+    def _key(cart_id) -> str:
+        return f"cart:{cart_id}"
+
+    @staticmethod
+    def _user_key(user_id) -> str:
+        return f"cart:user:{user_id}"
+
+
+def build_cart_store(backend: str = 'memory', ttl: float = 604800, maxsize: int = 100000,
+                     log_path: Optional[str] = None, log_fsync: bool = False,
+                     shared: Optional[CacheBackend] = None) -> CartStore:
+    if backend == 'memory':
+        log = CartLog(log_path, fsync=log_fsync) if log_path else None
+        return InMemoryCartStore(ttl=ttl, maxsize=maxsize, log=log)
+    if backend == 'shared':
+        return KeyValueCartStore(shared or SharedCache(), ttl=ttl)
+    raise ValueError(f"Unknown cart store: {backend}")
@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from app.infrastructure.cache import CacheBackend
+
+
+class CatalogVersion:
+    """Catalog-wide validator that every product write replaces.
+
+    The version is a random token rather than an incrementing counter so a
+    bump is a single blind write, which keeps it safe on a shared store
+    without atomic increments. Entries missing from the store (first start,
+    eviction) are simply re-issued, which at worst costs one round of 200s.
+    """
+
+    KEY = 'catalog:version'
+
+    def __init__(self, store: CacheBackend):
+        self.store = store
+
+    def current(self) -> Tuple[str, datetime]:
+        state = self.store.get(self.KEY)
+        if state is None:
+            state = self.bump()
+        return state
+
+    def bump(self) -> Tuple[str, datetime]:
+        # HTTP dates have one-second resolution, so round up: a validator
+        # taken earlier in this second must compare older than this write.
+        # Writes within one second share it and are told apart by the ETag.
+        now = datetime.now(timezone.utc)
+        modified = now.replace(microsecond=0)
+        if modified < now:
+            modified += timedelta(seconds=1)
+        state = (uuid.uuid4().hex, modified)
+        self.store.set(self.KEY, state)
+        return state
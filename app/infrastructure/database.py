@@ -1,4 +1,16 @@
+from contextlib import contextmanager
+
 from app import db
 
 def init_db():
-    db.create_all()
\ No newline at end of file
+    db.create_all()
+
+@contextmanager
+def transaction():
+    """Commit everything done inside the block once, or roll it all back."""
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
\ No newline at end of file
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from app import db
+
+
+class _Slot:
+    __slots__ = ('unit', 'done', 'promoted', 'result', 'error')
+
+    def __init__(self, unit: Callable[[], Any]):
+        self.unit = unit
+        self.done = threading.Event()
+        self.promoted = False
+        self.result = None
+        self.error = None
+
+
+class GroupCommitter:
+    """Combines concurrent units of work into one transaction and one commit.
+
+    The first caller to arrive becomes the group leader: while another group
+    is still committing it waits up to ``window`` seconds (or until
+    ``max_batch`` units are pending), then runs every pending unit in its own
+    session and commits once. A lone caller on an idle committer does not
+    wait at all. The other callers
+    block until the group's outcome is known and then get their own result
+    or exception back. A leader runs one group only: if a full batch left
+    callers behind, the first of them is woken to lead the next group, so no
+    request thread ends up serving other callers indefinitely.
+
+    A unit rejects its request by raising ``ValueError`` before writing
+    anything; that only fails its own caller. Any other error rolls the group
+    back and its units are retried one transaction each, so one bad unit
+    cannot fail the others.
+    """
+
+    def __init__(self, window: float = 0.003, max_batch: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: List[_Slot] = []
+        self._collecting = False
+        self._committing = 0
+        self.groups = 0
+        self.units = 0
+        self.fallbacks = 0
+
+    def run(self, unit: Callable[[], Any]) -> Any:
+        slot = _Slot(unit)
+        with self._cond:
+            self._pending.append(slot)
+            leader = not self._collecting
+            if leader:
+                self._collecting = True
+            elif len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if leader:
+            self._lead()
+        else:
+            slot.done.wait()
+            if slot.promoted:
+                # Woken to lead, not because the unit ran; it runs in our group
+                slot.done.clear()
+                self._lead()
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'groups': self.groups,
+            'units': self.units,
+            'avg_group_size': round(self.units / self.groups, 2) if self.groups else 0.0,
+            'fallbacks': self.fallbacks,
+        }
+
+    def _lead(self) -> None:
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while len(self._pending) < self.max_batch and self._committing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            # Callers arriving from here on form the next group; if a full
+            # batch left some behind, the oldest of them leads it
+            successor = self._pending[0] if self._pending else None
+            self._collecting = successor is not None
+            if successor is not None:
+                successor.promoted = True
+            self._committing += 1
+        if successor is not None:
+            successor.done.set()
+        try:
+            self._execute(batch)
+        finally:
+            with self._cond:
+                self._committing -= 1
+                self._cond.notify_all()
+            for slot in batch:
+                slot.done.set()
+
+    def _execute(self, batch: List[_Slot]) -> None:
+        try:
+            for slot in batch:
+                try:
+                    slot.result = slot.unit()
+                except ValueError as e:
+                    slot.error = e
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0].result, batch[0].error = None, e
+                self._record(batch)
+                return
+            with self._cond:
+                self.fallbacks += 1
+            for slot in batch:
+                slot.result = slot.error = None
+                self._execute([slot])
+            return
+        self._record(batch)
+
+    def _record(self, batch: List[_Slot]) -> None:
+        with self._cond:
+            self.groups += 1
+            self.units += len(batch)
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+from app.dtos.exceptions import ConflictException, ValidationException
+
+
+class IdempotencyStore:
+    """Runs a request at most once per idempotency key.
+
+    ``run`` returns ``(result, replayed)``. The first caller for a key runs
+    ``func`` and its result is kept for the store's TTL; later callers get
+    that result back without running anything, and callers arriving while it
+    is still running wait for it. If ``func`` raises, nothing is stored and
+    the next caller runs it again.
+
+    A shared implementation (e.g. Redis SET NX for the claim plus a stored
+    response) lets retries that land on another worker replay as well.
+    """
+
+    def run(self, key: Hashable, fingerprint: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        raise NotImplementedError
+
+
+class _Entry:
+    __slots__ = ('fingerprint', 'finished', 'completed', 'result', 'expires_at')
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.finished = threading.Event()
+        self.completed = False
+        self.result = None
+        self.expires_at = None
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    def __init__(self, ttl: float = 86400, maxsize: int = 100000, wait_timeout: float = 10.0,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.wait_timeout = wait_timeout
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, key, fingerprint, func):
+        while True:
+            with self._lock:
+                self._purge_expired()
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _Entry(fingerprint)
+                    owner = True
+                else:
+                    owner = False
+            if entry.fingerprint != fingerprint:
+                raise ValidationException("Idempotency-Key was already used with a different request")
+            if owner:
+                return self._execute(key, entry, func), False
+            if not entry.finished.wait(self.wait_timeout):
+                raise ConflictException("A request with this Idempotency-Key is still in progress")
+            if entry.completed:
+                return entry.result, True
+            # The first attempt failed without a result; compete to run it again
+
+    def _execute(self, key, entry: _Entry, func):
+        try:
+            result = func()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.finished.set()
+            raise
+        with self._lock:
+            entry.result = result
+            entry.completed = True
+            entry.expires_at = self._clock() + self.ttl
+            # Completed entries move to the back so the front stays ordered by expiry
+            self._entries.move_to_end(key)
+        entry.finished.set()
+        return result
+
+    def _purge_expired(self):
+        # In-flight entries are skipped rather than ending the scan; the
+        # completed ones are in expiry order, so stop at the first live one
+        now = self._clock()
+        excess = len(self._entries) - self.maxsize
+        stale = []
+        for key, entry in self._entries.items():
+            if not entry.completed:
+                continue
+            if entry.expires_at <= now or len(stale) < excess:
+                stale.append(key)
+            else:
+                break
+        for key in stale:
+            del self._entries[key]
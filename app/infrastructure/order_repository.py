@@ -1,4 +1,8 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import func, insert, update
 from app.domain.order import Order
+from app.domain.order_item import OrderItem
+from app.domain.product import Product
 from app import db
 
 class OrderRepository:
@@ -7,5 +11,95 @@ class OrderRepository:
         db.session.commit()
         return order
 
+    def add_order(self, order):
+        db.session.add(order)
+        db.session.flush()
+        return order
+
+    def detach(self, order):
+        # Attributes loaded by the flush stay readable after the session moves on
+        db.session.expunge(order)
+        return order
+
+    def add_order_items(self, order_id: int, items: List[Dict[str, Any]]) -> None:
+        rows = [dict(item, order_id=order_id) for item in items]
+        db.session.execute(insert(OrderItem), rows)
+
+    def find_order(self, order_id, refresh: bool = False):
+        # refresh reloads an order this session has already loaded
+        return db.session.get(Order, order_id, populate_existing=refresh)
+
+    def find_order_rows(self, order_ids: List[int], status: str) -> List[Any]:
+        return (
+            db.session.query(Order.id, Order.product_id, Order.quantity, Order.created_at, Order.unit_price)
+            .filter(Order.id.in_(order_ids), Order.status == status)
+            .all()
+        )
+
+    def find_order_ids_by_status(self, status: str) -> List[int]:
+        return [order_id for order_id, in db.session.query(Order.id).filter(Order.status == status).order_by(Order.id)]
+
+    def set_status(self, order_ids: List[int], status: str, expected: Optional[str] = None) -> int:
+        """Set ``status`` on the orders, only those currently in ``expected`` if given; returns rows changed."""
+        if not order_ids:
+            return 0
+        statement = update(Order.__table__).where(Order.id.in_(order_ids))
+        if expected is not None:
+            statement = statement.where(Order.status == expected)
+        return db.session.execute(statement.values(status=status)).rowcount
+
     def find_orders_by_user(self, user_id):
-        return Order.query.filter_by(user_id=user_id).all()
\ No newline at end of file
+        return Order.query.filter_by(user_id=user_id).all()
+
+    def find_order_rows_page(
+        self,
+        user_id,
+        limit: int,
+        before_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> List[Any]:
+        """Newest-first keyset page served by the (user_id, id) / (user_id, status) indexes."""
+        query = db.session.query(Order.id, Order.product_id, Order.quantity, Order.status).filter(
+            Order.user_id == user_id
+        )
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if before_id is not None:
+            query = query.filter(Order.id < before_id)
+        return query.order_by(Order.id.desc()).limit(limit).all()
+
+    def iter_order_rows_by_user(self, user_id, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        query = (
+            db.session.query(Order.id, Order.product_id, Order.quantity, Order.status)
+            .filter(Order.user_id == user_id)
+            .order_by(Order.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in query:
+            yield row._asdict()
+
+    def order_id_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        return tuple(db.session.query(func.min(Order.id), func.max(Order.id)).one())
+
+    def find_sales_lines(self, excluded_statuses: List[str], id_range: Tuple[int, int]) -> List[Any]:
+        """``(id, created_at, product_id, quantity, unit_price)`` for every line of the matching orders.
+
+        ``id_range`` is inclusive and orders in ``excluded_statuses`` are
+        skipped. Orders from before prices were recorded fall back to the
+        product's current price.
+        """
+        placed = (Order.status.notin_(excluded_statuses), Order.created_at.isnot(None), Order.id.between(*id_range))
+        single = (
+            db.session.query(
+                Order.id, Order.created_at, Order.product_id, Order.quantity,
+                func.coalesce(Order.unit_price, Product.price)
+            )
+            .outerjoin(Product, Product.id == Order.product_id)
+            .filter(Order.product_id.isnot(None), *placed)
+        )
+        lines = (
+            db.session.query(Order.id, Order.created_at, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .filter(*placed)
+        )
+        return single.all() + lines.all()
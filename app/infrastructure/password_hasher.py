@@ -0,0 +1,146 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from app.dtos.exceptions import ServiceUnavailableException
+from app.infrastructure.metrics import LatencyStats
+
+
+def _hash(password: str, method: str, salt_length: int) -> Tuple[str, float, float]:
+    started = time.time()
+    clock = time.perf_counter()
+    return generate_password_hash(password, method=method, salt_length=salt_length), started, time.perf_counter() - clock
+
+
+def _verify(pwhash: str, password: str) -> Tuple[bool, float, float]:
+    started = time.time()
+    clock = time.perf_counter()
+    return check_password_hash(pwhash, password), started, time.perf_counter() - clock
+
+
+def normalize_method(method: str) -> str:
+    """Spell out werkzeug's defaults, so 'scrypt' compares equal to 'scrypt:32768:8:1'."""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        args = ['32768', '8', '1']
+    elif name == 'pbkdf2' and len(args) < 2:
+        args = (args or ['sha256']) + [str(DEFAULT_PBKDF2_ITERATIONS)]
+    return ':'.join([name] + args)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in a process pool of ``workers`` processes.
+
+    Key derivation is deliberately CPU-heavy; running it in request threads
+    holds the GIL and starves every other request, and a thread pool would
+    still run on one core. At most ``max_pending`` operations may be queued
+    or running; beyond that callers get ServiceUnavailableException straight
+    away instead of queueing behind a login burst. ``workers=0`` hashes in
+    the calling thread, still under the same limit.
+
+    ``method`` and ``salt_length`` are werkzeug's, e.g. ``scrypt:32768:8:1``
+    or ``pbkdf2:sha256:600000``; verification reads the parameters from the
+    stored hash, so changing them only affects new hashes.
+    """
+
+    def __init__(self, method: str = 'scrypt', salt_length: int = 16, workers: int = 2, max_pending: int = 64,
+                 timeout: float = 10.0, retry_after: int = 1):
+        self.method = method
+        self.target_method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.queue_wait = LatencyStats()
+        self.hash_time = LatencyStats()
+        self.pending = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True when ``pwhash`` was made with another method, cost or salt length."""
+        method, _, rest = pwhash.partition('$')
+        salt = rest.partition('$')[0]
+        return normalize_method(method) != self.target_method or len(salt) != self.salt_length
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'method': self.method.split(':')[0],
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'queue_wait': self.queue_wait.snapshot(),
+            'hash_time': self.hash_time.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise ServiceUnavailableException("Too many password checks in progress, retry shortly",
+                                              retry_after=self.retry_after)
+        self._adjust_pending(1)
+        submitted = time.time()
+        if not self.workers:
+            try:
+                result, started, seconds = function(*args)
+            finally:
+                self._release()
+        else:
+            try:
+                future = self._executor().submit(function, *args)
+            except BaseException:
+                self._release()
+                raise
+            # The slot stays taken until the work finishes, even if we stop waiting
+            future.add_done_callback(lambda _: self._release())
+            try:
+                result, started, seconds = future.result(timeout=self.timeout)
+            except (BrokenProcessPool, FutureTimeoutError) as e:
+                self.failed += 1
+                if isinstance(e, BrokenProcessPool):
+                    # A crashed worker breaks the whole pool; start a new one next time
+                    self.shutdown()
+                raise ServiceUnavailableException("Password hashing is unavailable, retry shortly",
+                                                  retry_after=self.retry_after)
+        self.queue_wait.observe(max(started - submitted, 0.0))
+        self.hash_time.observe(seconds)
+        return result
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # Forking a threaded server process is unsafe; start clean interpreters
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _release(self) -> None:
+        self._adjust_pending(-1)
+        self._slots.release()
+
+    def _adjust_pending(self, delta: int) -> None:
+        with self._lock:
+            self.pending += delta
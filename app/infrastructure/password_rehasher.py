@@ -0,0 +1,72 @@
+import logging
+import queue
+import threading
+from typing import Dict
+
+from app.dtos.exceptions import ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordRehasher:
+    """Upgrades outdated password hashes after successful logins, off the request path.
+
+    Login only queues ``(user_id, old_hash, password)``. A background thread,
+    started on first use, hashes with the app's PasswordHasher and writes
+    the result back only if the stored hash is still ``old_hash``, so a
+    password changed in the meantime is never overwritten. When the queue is
+    full or the hashing pool is saturated the upgrade is dropped and the
+    next login tries again. Plaintext passwords are held only while queued.
+    """
+
+    def __init__(self, app, maxsize: int = 1000):
+        self.app = app
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.rehashed = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    def submit(self, user_id: int, old_hash: str, password: str) -> bool:
+        try:
+            self._queue.put_nowait((user_id, old_hash, password))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self._start()
+        return True
+
+    def join(self) -> None:
+        """Block until every queued upgrade has been handled."""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {'queued': self._queue.qsize(), 'rehashed': self.rehashed, 'skipped': self.skipped,
+                'dropped': self.dropped}
+
+    def _start(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='password-rehasher', daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        from app.infrastructure.user_repository import UserRepository
+        while True:
+            user_id, old_hash, password = self._queue.get()
+            try:
+                with self.app.app_context():
+                    new_hash = self.app.extensions['password_hasher'].hash(password)
+                    if UserRepository().replace_password_hash(user_id, old_hash, new_hash):
+                        self.rehashed += 1
+                    else:
+                        self.skipped += 1
+            except ServiceUnavailableException:
+                self.dropped += 1
+            except Exception:
+                logger.exception("Password rehash for user %s failed", user_id)
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
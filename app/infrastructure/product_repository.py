@@ -1,25 +1,403 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import Row, and_, bindparam, case, func, insert, or_, text, update
+from sqlalchemy.orm import make_transient_to_detached
 from app.domain.product import Product
+from app.infrastructure.cache import CacheBackend
+from app.infrastructure.stock_shard_repository import StockShardRepository
 from app import db
 
 class ProductRepository:
-    
+    ROW_COLUMNS = (Product.id, Product.name, Product.price, Product.stock)
+
+    def __init__(self, cache: Optional[CacheBackend] = None):
+        self._cache = cache
+        self.shards = StockShardRepository()
+
+    @property
+    def cache(self) -> Optional[CacheBackend]:
+        if self._cache is not None:
+            return self._cache
+        return current_app.extensions.get('product_cache')
+
     def save_product(self, product: Product) -> Product:
         db.session.add(product)
         db.session.commit()
+        self.invalidate(product.id)
+        self._catalog_changed()
         return product
 
+    def insert_products(self, rows: List[Dict[str, Any]]) -> int:
+        # One executemany INSERT and one commit for the whole batch
+        try:
+            db.session.execute(insert(Product), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self._catalog_changed()
+        return len(rows)
+
+    def reserve_stock(self, product_id: int, quantity: int) -> bool:
+        """Atomically take ``quantity`` units if available, inside the caller's transaction.
+
+        The stock check and the decrement are one conditional UPDATE, so two
+        concurrent orders can never both see the same units as available.
+        Sharded products are decremented through their shard rows instead.
+        Whether a product is sharded is read from its row, never the cache,
+        so another process switching it in or out of sharding is seen here.
+        """
+        statement = (
+            update(Product.__table__)
+            .where(Product.id == product_id, Product.stock_shards == 0, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity)
+        )
+        if db.session.execute(statement).rowcount == 1:
+            return True
+        shards = self._shard_counts([product_id]).get(product_id)
+        return bool(shards) and self.shards.reserve(product_id, shards, quantity)
+
+    def reserve_stock_batch(self, quantities: Dict[int, int]) -> bool:
+        """Take stock for several products with one conditional UPDATE, all or nothing.
+
+        Rows are matched through the primary key in ascending order, so
+        concurrent checkouts lock shared products in the same order. Returns
+        False, leaving stock untouched once the caller rolls back, unless
+        every product had enough.
+        """
+        if not quantities:
+            return True
+        shard_counts = self._shard_counts(list(quantities))
+        if len(shard_counts) != len(quantities):
+            return False
+        sharded = {product_id: shards for product_id, shards in shard_counts.items() if shards}
+        product_ids = sorted(set(quantities) - set(sharded))
+        if product_ids:
+            wanted = case({product_id: quantities[product_id] for product_id in product_ids}, value=Product.id)
+            statement = (
+                update(Product.__table__)
+                # A product sharded since the read above no longer matches
+                .where(Product.id.in_(product_ids), Product.stock_shards == 0, Product.stock >= wanted)
+                .values(stock=Product.stock - wanted)
+            )
+            if db.session.execute(statement).rowcount != len(product_ids):
+                return False
+        return all(
+            self.shards.reserve(product_id, sharded[product_id], quantities[product_id]) for product_id in sorted(sharded)
+        )
+
+    def find_stock_and_prices(self, product_ids: List[int]) -> Dict[int, Tuple[int, float]]:
+        rows = db.session.query(Product.id, Product.stock, Product.price).filter(Product.id.in_(product_ids))
+        return {product_id: (stock, price) for product_id, stock, price in rows}
+
+    def stock_changed(self, product_ids: List[int]) -> None:
+        """Refresh derived state after a committed stock change made with SQL."""
+        if any(self.stock_shard_count(product_id) for product_id in product_ids):
+            # product.stock catches up on the next reconciliation, which
+            # invalidates and bumps again
+            reconciler = current_app.extensions.get('stock_reconciler')
+            if reconciler is not None:
+                reconciler.request()
+        for product_id in product_ids:
+            self.invalidate(product_id)
+        self._catalog_changed()
+
+    def _shard_counts(self, product_ids: List[int]) -> Dict[int, int]:
+        rows = db.session.query(Product.id, Product.stock_shards).filter(Product.id.in_(product_ids))
+        return {product_id: shards or 0 for product_id, shards in rows}
+
+    def stock_shard_count(self, product_id: int) -> int:
+        state = self.find_product_states([product_id]).get(product_id)
+        return (state.get('stock_shards') or 0) if state else 0
+
+    def shard_stock(self, product_id: int, shards: int, stock: Optional[int] = None) -> int:
+        """Spread the product's stock over ``shards`` counter rows (0 folds it back).
+
+        ``stock`` replaces the current level; by default the current total is
+        kept. Returns the total and commits.
+        """
+        try:
+            product = db.session.query(Product).filter(Product.id == product_id).with_for_update().one()
+            if stock is None:
+                stock = self.shards.total(product_id) if product.stock_shards else product.stock
+            self.shards.distribute(product_id, shards, stock)
+            db.session.execute(
+                update(Product.__table__).where(Product.id == product_id).values(stock=stock, stock_shards=shards)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate(product_id)
+        self._catalog_changed()
+        return stock
+
+    def reconcile_sharded_stock(self) -> int:
+        """Write each sharded product's shard total into ``product.stock``; returns how many changed."""
+        current = db.session.query(Product.id, Product.stock).filter(Product.stock_shards > 0).all()
+        totals = self.shards.totals()
+        changed = [
+            {'b_id': product_id, 'b_stock': totals.get(product_id, 0)}
+            for product_id, stock in current if stock != totals.get(product_id, 0)
+        ]
+        if not changed:
+            return 0
+        table = Product.__table__
+        # A product unsharded meanwhile has its authoritative stock in the row again
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('b_id'), table.c.stock_shards > 0)
+            .values(stock=bindparam('b_stock'))
+        )
+        try:
+            db.session.execute(statement, changed)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for row in changed:
+            self.invalidate(row['b_id'])
+        self._catalog_changed()
+        return len(changed)
+
     def find_product_by_id(self, product_id: int) -> Optional[Product]:
-        return Product.query.get(product_id)
+        cache = self.cache
+        if cache is None:
+            return Product.query.get(product_id)
+        state = cache.get(self._cache_key(product_id))
+        if state is not None:
+            return self._attach(state)
+        product = Product.query.get(product_id)
+        if product is not None:
+            cache.set(self._cache_key(product_id), self._snapshot(product))
+        return product
+
+    def invalidate(self, product_id: int) -> None:
+        cache = self.cache
+        if cache is not None:
+            cache.delete(self._cache_key(product_id))
 
     def find_all_products(self) -> List[Product]:
         return Product.query.all()
-    
+
+    def find_products_by_ids(self, product_ids: List[int]) -> List[Product]:
+        if not product_ids:
+            return []
+        return Product.query.filter(Product.id.in_(product_ids)).all()
+
+    def find_product_states(self, product_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Column values for ``product_ids``: cache first, then one IN query for the rest."""
+        cache = self.cache
+        states = {}
+        if cache is not None:
+            for product_id in product_ids:
+                state = cache.get(self._cache_key(product_id))
+                if state is not None:
+                    states[product_id] = state
+        missing = [product_id for product_id in product_ids if product_id not in states]
+        if missing:
+            columns = Product.__table__.columns
+            for row in db.session.query(*columns).filter(Product.id.in_(missing)):
+                state = row._asdict()
+                states[state['id']] = state
+                if cache is not None:
+                    cache.set(self._cache_key(state['id']), state)
+        return states
+
+    def iter_search_documents(
+        self,
+        product_ids: Optional[List[int]] = None,
+        batch_size: int = 10000
+    ) -> Iterator[Tuple[int, str]]:
+        query = db.session.query(Product.id, Product.name)
+        if product_ids is not None:
+            query = query.filter(Product.id.in_(product_ids))
+        query = query.execution_options(yield_per=batch_size)
+        for product_id, name in query:
+            yield product_id, name
+
+    def find_product_rows_page(
+        self,
+        limit: int,
+        sort: str = 'id',
+        after: Optional[Tuple[Any, int]] = None,
+        **filters
+    ) -> List[Row]:
+        query = self._keyset_query(db.session.query(*self.ROW_COLUMNS), sort, after, **filters)
+        return query.limit(limit).all()
+
+    def iter_product_rows(
+        self,
+        sort: str = 'id',
+        after: Optional[Tuple[Any, int]] = None,
+        batch_size: int = 1000,
+        **filters
+    ) -> Iterator[Dict[str, Any]]:
+        # Plain column rows fetched through a server-side cursor, so memory
+        # stays flat however many products match
+        query = self._keyset_query(db.session.query(*self.ROW_COLUMNS), sort, after, **filters)
+        for row in query.execution_options(yield_per=batch_size):
+            yield row._asdict()
+
+    def count_products(self, **filters) -> int:
+        query = self._apply_filters(db.session.query(func.count(Product.id)), **filters)
+        return query.scalar()
+
+    def estimate_product_count(self) -> Optional[int]:
+        # Table statistics are only available on MySQL; callers fall back to COUNT
+        if db.engine.dialect.name != 'mysql':
+            return None
+        return db.session.execute(text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ), {'table': Product.__tablename__}).scalar()
+
+    def patch_products(self, patches: List[Dict[str, Any]]) -> int:
+        """Apply ``{id, price?, stock?}`` patches in one transaction.
+
+        Patches are grouped by the columns they set so each group runs as a
+        single executemany UPDATE keyed on the primary key.
+        """
+        table = Product.__table__
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for patch in patches:
+            columns = tuple(sorted(k for k in patch if k != 'id'))
+            groups.setdefault(columns, []).append({f'b_{k}': v for k, v in patch.items()})
+        affected = 0
+        try:
+            for columns, params in groups.items():
+                statement = (
+                    update(table)
+                    .where(table.c.id == bindparam('b_id'))
+                    .values({column: bindparam(f'b_{column}') for column in columns})
+                )
+                affected += db.session.execute(statement, params).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        shard_counts = self._shard_counts([patch['id'] for patch in patches if 'stock' in patch])
+        for patch in patches:
+            self.invalidate(patch['id'])
+            shards = shard_counts.get(patch['id'], 0)
+            if shards:
+                self.shard_stock(patch['id'], shards, stock=patch['stock'])
+        self._catalog_changed()
+        return affected
+
+    def adjust_products(
+        self,
+        id_range: Tuple[int, int],
+        price_percent: Optional[float] = None,
+        stock_delta: Optional[int] = None,
+        **filters
+    ) -> int:
+        """Run one set-based UPDATE over ``id_range`` (inclusive) and commit.
+
+        The matching ids are read first, before a price change can move rows
+        out of the filter, so exactly those cache entries are invalidated.
+        """
+        values = {}
+        if price_percent is not None:
+            values['price'] = func.round(Product.price * (1 + price_percent / 100), 2)
+        if stock_delta is not None:
+            new_stock = Product.stock + stock_delta
+            # Sharded stock is owned by the shard rows; reconciliation would undo this
+            values['stock'] = case((Product.stock_shards > 0, Product.stock), (new_stock < 0, 0), else_=new_stock)
+        criteria = (Product.id.between(*id_range), *self._filter_clauses(**filters))
+        statement = update(Product.__table__).where(*criteria).values(values)
+        try:
+            product_ids = []
+            if self.cache is not None:
+                product_ids = [product_id for product_id, in db.session.query(Product.id).filter(*criteria)]
+            affected = db.session.execute(statement).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for product_id in product_ids:
+            self.invalidate(product_id)
+        if affected:
+            self._catalog_changed()
+        return affected
+
+    def product_id_bounds(self, **filters) -> Tuple[Optional[int], Optional[int]]:
+        query = db.session.query(func.min(Product.id), func.max(Product.id))
+        return tuple(self._apply_filters(query, **filters).one())
+
     def delete_product(self, product: Product) -> bool:
+        product_id = product.id
         try:
+            self.shards.remove(product_id)
             db.session.delete(product)
             db.session.commit()
             return True
         except Exception:
             db.session.rollback()
-            return False
\ No newline at end of file
+            return False
+        finally:
+            self.invalidate(product_id)
+            self._catalog_changed()
+
+    def _catalog_changed(self) -> None:
+        version = current_app.extensions.get('catalog_version')
+        if version is not None:
+            version.bump()
+
+    def _keyset_query(self, query, sort: str, after: Optional[Tuple[Any, int]], **filters):
+        sort_column = getattr(Product, sort)
+        query = self._apply_filters(query, **filters)
+        if after is not None:
+            key, last_id = after
+            if sort == 'id':
+                query = query.filter(Product.id > last_id)
+            else:
+                query = query.filter(or_(
+                    sort_column > key,
+                    and_(sort_column == key, Product.id > last_id)
+                ))
+        order_by = [Product.id] if sort == 'id' else [sort_column, Product.id]
+        return query.order_by(*order_by)
+
+    def _apply_filters(self, query, **filters):
+        return query.filter(*self._filter_clauses(**filters))
+
+    @staticmethod
+    def _filter_clauses(
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+        name_prefix: Optional[str] = None,
+        min_stock: Optional[int] = None,
+        max_stock: Optional[int] = None
+    ) -> List[Any]:
+        clauses = []
+        if min_price is not None:
+            clauses.append(Product.price >= min_price)
+        if max_price is not None:
+            clauses.append(Product.price <= max_price)
+        if in_stock:
+            clauses.append(Product.stock > 0)
+        if name_prefix:
+            clauses.append(Product.name.startswith(name_prefix, autoescape=True))
+        if min_stock is not None:
+            clauses.append(Product.stock >= min_stock)
+        if max_stock is not None:
+            clauses.append(Product.stock <= max_stock)
+        return clauses
+
+    @staticmethod
+    def _cache_key(product_id: int) -> str:
+        return f"product:{product_id}"
+
+    @staticmethod
+    def _snapshot(product: Product) -> Dict[str, Any]:
+        return {column.key: getattr(product, column.key) for column in Product.__table__.columns}
+
+    @staticmethod
+    def _attach(state: Dict[str, Any]) -> Product:
+        # Rebuild a persistent instance from cached column values without a
+        # SELECT; merge(load=False) reuses one already in the session if present
+        product = Product(**state)
+        make_transient_to_detached(product)
+        return db.session.merge(product, load=False)
@@ -0,0 +1,92 @@
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.domain.sales_rollup import DailyProductSales, DailySales
+from app import db
+
+# (day, product_id) -> [units, revenue] and day -> [orders, units, revenue]
+ProductDeltas = Dict[Tuple[date, int], List[Any]]
+DayDeltas = Dict[date, List[Any]]
+
+
+class SalesRollupRepository:
+    def add(self, product_deltas: ProductDeltas, day_deltas: DayDeltas) -> None:
+        """Add the deltas to the rollup counters in one transaction."""
+        try:
+            self._upsert(DailyProductSales, ('day', 'product_id'), [
+                {'day': day, 'product_id': product_id, 'units': units, 'revenue': revenue}
+                for (day, product_id), (units, revenue) in product_deltas.items()
+            ])
+            self._upsert(DailySales, ('day',), [
+                {'day': day, 'orders': orders, 'units': units, 'revenue': revenue}
+                for day, (orders, units, revenue) in day_deltas.items()
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def clear(self) -> None:
+        try:
+            db.session.execute(delete(DailyProductSales))
+            db.session.execute(delete(DailySales))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def find_daily(self, start: date, end: date) -> List[Dict[str, Any]]:
+        query = (
+            db.session.query(DailySales.day, DailySales.orders, DailySales.units, DailySales.revenue)
+            .filter(DailySales.day.between(start, end))
+            .order_by(DailySales.day)
+        )
+        return [row._asdict() for row in query]
+
+    def find_product_daily(
+        self,
+        start: date,
+        end: date,
+        product_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        query = db.session.query(
+            DailyProductSales.day, DailyProductSales.product_id, DailyProductSales.units, DailyProductSales.revenue
+        ).filter(DailyProductSales.day.between(start, end))
+        if product_id is not None:
+            # Served by the (product_id, day) index
+            query = query.filter(DailyProductSales.product_id == product_id)
+        query = query.order_by(DailyProductSales.day, DailyProductSales.product_id).limit(limit)
+        return [row._asdict() for row in query]
+
+    def _upsert(self, model, keys: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+        """Insert counter rows, adding to the existing counters on a key conflict."""
+        if not rows:
+            return
+        table = model.__table__
+        counters = [column.name for column in table.columns if column.name not in keys]
+        if db.engine.dialect.name == 'mysql':
+            statement = mysql_insert(table)
+            statement = statement.on_duplicate_key_update(
+                {name: table.c[name] + statement.inserted[name] for name in counters}
+            )
+        else:
+            # SQLite and PostgreSQL share the ON CONFLICT form
+            dialect_insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={name: table.c[name] + statement.excluded[name] for name in counters}
+            )
+        db.session.execute(statement, rows)
+
+
+def to_cents(value: Any) -> Decimal:
+    """Exact two-place decimal for a price stored as a float."""
+    return Decimal(str(value)).quantize(Decimal('0.01'))
@@ -0,0 +1,50 @@
+import uuid
+from typing import List, Optional, Set, Tuple
+
+from app.infrastructure.cache import CacheBackend
+
+
+class SearchChangeLog:
+    """Shared record of which products' searchable text changed, for every worker's index.
+
+    Only writes that change what the index holds are recorded: creating,
+    renaming and deleting a product, and imports. Each record gets a random
+    version token; an index that knows the version it is at re-reads just
+    the products recorded after it. A record with ``None`` ids (an import)
+    or a version that has fallen off the bounded log means a full rebuild.
+
+    Recording is read-modify-write, like ``CatalogVersion.bump``; a networked
+    backend should append atomically (e.g. a Redis stream) so concurrent
+    workers cannot drop each other's records.
+    """
+
+    KEY = 'search:changes'
+    MAX_RECORDS = 1000
+
+    def __init__(self, store: CacheBackend):
+        self.store = store
+
+    def record(self, product_ids: Optional[List[int]]) -> Tuple[Optional[str], str]:
+        """Record a change to ``product_ids`` (``None``: unknown); returns ``(previous, new)`` versions."""
+        records = self.store.get(self.KEY) or []
+        previous = records[-1][0] if records else None
+        version = uuid.uuid4().hex
+        records.append((version, list(product_ids) if product_ids is not None else None))
+        self.store.set(self.KEY, records[-self.MAX_RECORDS:])
+        return previous, version
+
+    def since(self, version: Optional[str]) -> Tuple[Optional[str], Optional[Set[int]]]:
+        """Current version and the product ids changed after ``version``; ``None`` ids means rebuild."""
+        records = self.store.get(self.KEY) or []
+        current = records[-1][0] if records else None
+        if version == current:
+            return current, set()
+        changed: Set[int] = set()
+        for position in range(len(records) - 1, -1, -1):
+            record_version, product_ids = records[position]
+            if record_version == version:
+                return current, changed
+            if product_ids is None:
+                break
+            changed.update(product_ids)
+        return current, None
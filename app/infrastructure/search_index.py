@@ -0,0 +1,195 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class ProductSearchIndex:
+    """In-memory inverted index over product names with BM25 ranking.
+
+    Every query token also matches terms it is a prefix of, at a reduced
+    weight, so partially typed words still find results. Writes made in this
+    process are applied through ``add``/``remove``; ``refresh`` picks up
+    those made by other workers from a ``SearchChangeLog``, re-reading only
+    the documents that changed since the ``version`` the index is at.
+
+    Only the ``MAX_POSTINGS_SCORED`` highest-impact postings of each term are
+    scored. That list is precomputed per term and dropped whenever the term's
+    postings change, so a common term or a short prefix costs a bounded
+    amount of work under the lock. Documents beyond the cut still count
+    towards the match total.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    PREFIX_WEIGHT = 0.5
+    MAX_PREFIX_EXPANSIONS = 50
+    MAX_POSTINGS_SCORED = 1000
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._top_postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._terms: List[str] = []
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.built = False
+        self.version: Optional[str] = None
+        self.builds = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def build(self, documents: Iterable[Tuple[int, str]], version: Optional[str] = None) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._top_postings.clear()
+            self._terms.clear()
+            self._doc_terms.clear()
+            self._total_length = 0
+            for doc_id, text in documents:
+                self._add(doc_id, text, keep_terms_sorted=False)
+            self._terms = sorted(self._postings)
+            self.built = True
+            self.version = version
+            self.builds += 1
+
+    def ensure_built(self, loader: Callable[[], Iterable[Tuple[int, str]]]) -> None:
+        if self.built:
+            return
+        with self._lock:
+            if not self.built:
+                self.build(loader())
+
+    def refresh(
+        self,
+        changes_since: Callable[[Optional[str]], Tuple[Optional[str], Optional[Set[int]]]],
+        load_all: Callable[[], Iterable[Tuple[int, str]]],
+        load_some: Callable[[List[int]], Iterable[Tuple[int, str]]]
+    ) -> None:
+        """Catch up with ``changes_since(version)``, rebuilding only when it returns ``None`` ids."""
+        if self.built and changes_since(self.version)[0] == self.version:
+            return
+        with self._lock:
+            version, changed = changes_since(self.version)
+            if self.built and version == self.version:
+                return
+            if not self.built or changed is None:
+                self.build(load_all(), version)
+                return
+            documents = dict(load_some(sorted(changed)))
+            for doc_id in changed:
+                self._remove(doc_id)
+                if doc_id in documents:
+                    self._add(doc_id, documents[doc_id], keep_terms_sorted=True)
+            self.version = version
+
+    def advance(self, previous: Optional[str], version: str) -> None:
+        """Move to ``version`` after applying its change here, if nothing came in between."""
+        with self._lock:
+            if self.built and self.version == previous:
+                self.version = version
+
+    def invalidate(self) -> None:
+        # Bulk writes bypass add(); rebuild from the database on next use
+        with self._lock:
+            self.built = False
+
+    def add(self, doc_id: int, text: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+            self._add(doc_id, text, keep_terms_sorted=True)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[Tuple[int, float]], int]:
+        """Return the top ``limit`` ``(doc_id, score)`` pairs and the match count."""
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return [], 0
+            avg_length = self._total_length / doc_count
+            scores: Dict[int, float] = {}
+            matched = set()
+            for token in set(tokenize(query)):
+                for term, weight in self._expand(token):
+                    postings = self._postings[term]
+                    matched.update(postings)
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in self._top(term, avg_length):
+                        score = weight * idf * self._impact(doc_id, tf, avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + score
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            return top, len(matched)
+
+    def _impact(self, doc_id: int, tf: int, avg_length: float) -> float:
+        norm = self.K1 * (1 - self.B + self.B * len(self._doc_terms[doc_id]) / avg_length)
+        return tf * (self.K1 + 1) / (tf + norm)
+
+    def _top(self, term: str, avg_length: float) -> List[Tuple[int, int]]:
+        top = self._top_postings.get(term)
+        if top is None:
+            postings = self._postings[term]
+            if len(postings) <= self.MAX_POSTINGS_SCORED:
+                top = list(postings.items())
+            else:
+                top = heapq.nlargest(
+                    self.MAX_POSTINGS_SCORED,
+                    postings.items(),
+                    key=lambda item: (self._impact(item[0], item[1], avg_length), -item[0])
+                )
+            self._top_postings[term] = top
+        return top
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        position = bisect_left(self._terms, token)
+        while position < len(self._terms) and len(matches) < self.MAX_PREFIX_EXPANSIONS:
+            term = self._terms[position]
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append((term, self.PREFIX_WEIGHT))
+            position += 1
+        return matches
+
+    def _add(self, doc_id: int, text: str, keep_terms_sorted: bool) -> None:
+        terms = tokenize(text)
+        self._doc_terms[doc_id] = terms
+        self._total_length += len(terms)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if keep_terms_sorted:
+                    insort(self._terms, term)
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+            self._top_postings.pop(term, None)
+
+    def _remove(self, doc_id: int) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= len(terms)
+        for term in set(terms):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            self._top_postings.pop(term, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect_left(self._terms, term)
+                if position < len(self._terms) and self._terms[position] == term:
+                    del self._terms[position]
+
@@ -0,0 +1,87 @@
+import random
+from typing import Dict, List
+
+from sqlalchemy import delete, func, insert, update
+
+from app.domain.product_stock_shard import ProductStockShard
+from app import db
+
+
+class StockShardRepository:
+    """Stock for hot products split across ``shards`` counter rows.
+
+    Concurrent orders for the same product pick different shards at random,
+    so they update (and lock) different rows instead of queueing on one.
+    None of the methods commit; they run inside the caller's transaction.
+    """
+
+    def reserve(self, product_id: int, shards: int, quantity: int) -> bool:
+        """Take ``quantity`` units from one shard, trying a random one first.
+
+        When no single shard has enough, the units are gathered across
+        shards; if that fails too the stock is left exactly as it was.
+        """
+        first = random.randrange(shards)
+        for offset in range(shards):
+            if self._take(product_id, (first + offset) % shards, quantity):
+                return True
+        return self._take_spread(product_id, quantity)
+
+    def distribute(self, product_id: int, shards: int, stock: int) -> None:
+        """Replace the product's shards with ``shards`` rows holding ``stock`` in total."""
+        self.remove(product_id)
+        if shards:
+            base, extra = divmod(stock, shards)
+            db.session.execute(insert(ProductStockShard), [
+                {'product_id': product_id, 'shard': shard, 'stock': base + (1 if shard < extra else 0)}
+                for shard in range(shards)
+            ])
+
+    def remove(self, product_id: int) -> None:
+        db.session.execute(delete(ProductStockShard).where(ProductStockShard.product_id == product_id))
+
+    def total(self, product_id: int) -> int:
+        # Locks the shard rows so no order lands between the read and a redistribute
+        query = db.session.query(ProductStockShard.stock).filter(ProductStockShard.product_id == product_id)
+        return sum(stock for stock, in query.with_for_update())
+
+    def totals(self) -> Dict[int, int]:
+        query = db.session.query(ProductStockShard.product_id, func.sum(ProductStockShard.stock))
+        return dict(query.group_by(ProductStockShard.product_id).all())
+
+    def _take(self, product_id: int, shard: int, quantity: int) -> bool:
+        statement = (
+            update(ProductStockShard.__table__)
+            .where(
+                ProductStockShard.product_id == product_id,
+                ProductStockShard.shard == shard,
+                ProductStockShard.stock >= quantity
+            )
+            .values(stock=ProductStockShard.stock - quantity)
+        )
+        return db.session.execute(statement).rowcount == 1
+
+    def _take_spread(self, product_id: int, quantity: int) -> bool:
+        rows = (
+            db.session.query(ProductStockShard.shard, ProductStockShard.stock)
+            .filter(ProductStockShard.product_id == product_id, ProductStockShard.stock > 0)
+            .order_by(ProductStockShard.shard)
+            .all()
+        )
+        if sum(stock for _, stock in rows) < quantity:
+            return False
+        taken: List[tuple] = []
+        remaining = quantity
+        for shard, stock in rows:
+            amount = min(stock, remaining)
+            if not self._take(product_id, shard, amount):
+                # Another order got there first; put back what was taken so
+                # the caller can reject without rolling back its transaction
+                for taken_shard, taken_amount in taken:
+                    self._take(product_id, taken_shard, -taken_amount)
+                return False
+            taken.append((shard, amount))
+            remaining -= amount
+            if not remaining:
+                break
+        return True
@@ -0,0 +1,90 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.infrastructure.cache import CacheBackend, SharedCache
+
+
+class TokenRevocationList:
+    """Ids (``jti``) of revoked tokens, each kept only until the token expires.
+
+    Only token ids are stored, and only while the token itself is still
+    valid, so the set stays as small as the number of live revoked tokens.
+    """
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """Revoke ``jti`` until ``expires_at`` (epoch seconds); False if it already was."""
+        raise NotImplementedError
+
+    def is_revoked(self, jti: str) -> bool:
+        raise NotImplementedError
+
+
+class InMemoryTokenRevocationList(TokenRevocationList):
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._revoked: Dict[str, float] = {}
+        self._expiries: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        with self._lock:
+            self._purge_expired()
+            if jti in self._revoked:
+                return False
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiries, (expires_at, jti))
+            return True
+
+    def is_revoked(self, jti):
+        with self._lock:
+            expires_at = self._revoked.get(jti)
+            return expires_at is not None and expires_at > self._clock()
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def _purge_expired(self):
+        now = self._clock()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heapq.heappop(self._expiries)
+            self._revoked.pop(jti, None)
+
+
+class SharedTokenRevocationList(TokenRevocationList):
+    """Revocations in the shared key/value backend so every worker honours them.
+
+    ``revoke`` checks and sets under a process-local lock; a networked
+    backend should use an atomic set-if-absent (e.g. Redis SET NX EX) so a
+    token cannot be rotated twice by two workers at once.
+    """
+
+    def __init__(self, backend: CacheBackend, clock=time.time):
+        self.backend = backend
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        ttl = expires_at - self._clock()
+        with self._lock:
+            if self.backend.get(self._key(jti)) is not None:
+                return False
+            if ttl > 0:
+                self.backend.set(self._key(jti), True, ttl)
+            return True
+
+    def is_revoked(self, jti):
+        return self.backend.get(self._key(jti)) is not None
+
+    @staticmethod
+    def _key(jti) -> str:
+        return f"revoked-token:{jti}"
+
+
+def build_revocation_list(backend: str = 'local', shared: Optional[CacheBackend] = None) -> TokenRevocationList:
+    if backend == 'local':
+        return InMemoryTokenRevocationList()
+    if backend == 'shared':
+        return SharedTokenRevocationList(shared or SharedCache())
+    raise ValueError(f"Unknown token revocation backend: {backend}")
@@ -1,3 +1,5 @@
+from sqlalchemy import update
+
 from app.domain.user import User
 from app import db
 
@@ -7,5 +9,23 @@ class UserRepository:
         db.session.commit()
         return user
 
+    def find_user_by_id(self, user_id):
+        return db.session.get(User, user_id)
+
     def find_user_by_email(self, email):
-        return User.query.filter_by(email=email).first()
\ No newline at end of file
+        return User.query.filter_by(email=email).first()
+
+    def replace_password_hash(self, user_id, old_hash, new_hash):
+        """Swap in ``new_hash`` only if the stored hash is still ``old_hash``."""
+        statement = (
+            update(User.__table__)
+            .where(User.id == user_id, User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+        )
+        try:
+            replaced = db.session.execute(statement).rowcount == 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return replaced
@@ -13,6 +13,42 @@ def cart_to_response(cart):
     return CartResponse(
         id=cart.id,
         user_id=cart.user_id,
-        items=items
+        items=items,
+        version=cart.version
     )
 
+def cart_to_dict(cart):
+    response = cart_to_response(cart)
+    return dict(response.__dict__, items=[item.__dict__ for item in response.items])
+
+def cart_delta_to_dict(cart_id, version, item=None, removed_item_id=None):
+    """Only what a write changed, for clients that keep their own copy of the cart."""
+    delta = {'cart_id': cart_id, 'version': version}
+    if item is not None:
+        delta['item'] = cart_item_to_response(item).__dict__
+    if removed_item_id is not None:
+        delta['removed_item_id'] = removed_item_id
+    return delta
+
+def priced_cart_to_dict(cart, pricing):
+    """Cart with priced lines and totals; money is an exact decimal string."""
+    items = []
+    for line in pricing['lines']:
+        item = cart_item_to_response(line['item']).__dict__
+        item.update(
+            name=line['name'],
+            unit_price=_money(line['unit_price']),
+            line_total=_money(line['line_total']),
+            in_stock=line['in_stock']
+        )
+        items.append(item)
+    return dict(
+        cart_to_dict(cart),
+        items=items,
+        subtotal=_money(pricing['subtotal']),
+        units=pricing['units'],
+        all_in_stock=pricing['all_in_stock']
+    )
+
+def _money(value):
+    return str(value) if value is not None else None
@@ -1,8 +1,13 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from app.application.pagination import Page
 from app.domain.product import Product
-from app.dtos.responses.product_responses import ProductResponse, ProductListResponse, ProductMessageResponse
+from app.dtos.responses.product_responses import ProductResponse, ProductListResponse, ProductMessageResponse, ProductRow
 from app.dtos.requests.product_requests import ProductCreateRequest, ProductUpdateRequest
 
+_product_rows = TypeAdapter(List[ProductRow])
+
 class ProductMapper:
     
     @staticmethod
@@ -16,6 +21,31 @@ class ProductMapper:
             total=total
         )
     
+    @staticmethod
+    def rows_to_dicts(rows: Sequence[Row]) -> List[Dict[str, Any]]:
+        # Column rows skip ORM hydration; the whole batch is validated in one
+        # pydantic-core call instead of a model_validate per product
+        if not rows:
+            return []
+        keys = rows[0]._fields
+        return _product_rows.validate_python(
+            [dict(zip(keys, row), created_at=None, updated_at=None) for row in rows]
+        )
+
+    @staticmethod
+    def states_to_dicts(states: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return _product_rows.validate_python(
+            [dict(state, created_at=None, updated_at=None) for state in states]
+        )
+
+    @staticmethod
+    def to_page_dict(page: Page) -> Dict[str, Any]:
+        return {
+            'products': ProductMapper.rows_to_dicts(page.items),
+            'total': page.total,
+            'next_cursor': page.next_cursor
+        }
+    
     @staticmethod
     def to_message_response(message: str, product_id: int = None) -> ProductMessageResponse:
 
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from flask_restx import Namespace, Resource, fields
 from app.application.auth_service import AuthService
+from app.dtos.exceptions import ServiceUnavailableException, UnauthorizedException
+from app.presentation.product_controller import _get_user_role
 from sqlalchemy.exc import IntegrityError
 
 
@@ -24,6 +27,7 @@ class Register(Resource):
     @api.expect(register_model)
     @api.response(201, 'User registered')
     @api.response(400, 'Email or username already exists')
+    @api.response(503, 'Password hashing saturated; retry after Retry-After seconds')
     def post(self):
         data = api.payload
         try:
@@ -35,12 +39,15 @@ class Register(Resource):
             return {'error': str(e), 'message': 'Email already exists'}, 400
         except IntegrityError:
             return {'error': 'Username or email already exists'}, 400
+        except ServiceUnavailableException as e:
+            return {'error': e.message}, e.status_code, _retry_after(e)
 
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
     @api.response(200, 'Login successful')
     @api.response(401, 'Invalid credentials')
+    @api.response(503, 'Password hashing saturated; retry after Retry-After seconds')
     def post(self):
         data = api.payload
         if not data.get('email'):
@@ -48,10 +55,36 @@ class Login(Resource):
         if not data.get('password'):
             return {'error': 'Password is required'}, 401
         try:
-            token = AuthService().login_user(data['email'], data['password'])
-            return {'access_token': token}, 200
+            return AuthService().login_user(data['email'], data['password']), 200
         except ValueError as e:
             return {'error': str(e)}, 401
+        except ServiceUnavailableException as e:
+            return {'error': e.message}, e.status_code, _retry_after(e)
+
+@api.route('/refresh')
+class Refresh(Resource):
+    @api.response(200, 'New access and refresh tokens; the presented refresh token is revoked')
+    @api.response(401, 'Missing, expired or already used refresh token')
+    @jwt_required(refresh=True)
+    def post(self):
+        try:
+            return AuthService().refresh_tokens(get_jwt_identity(), get_jwt()), 200
+        except UnauthorizedException as e:
+            return {'error': e.message}, e.status_code
+
+@api.route('/hash-metrics')
+class PasswordHashMetrics(Resource):
+    @api.response(200, 'Password hashing pool load, rejections, queue wait, hash time and rehash counts')
+    @jwt_required()
+    def get(self):
+        if _get_user_role(get_jwt_identity(), get_jwt()) != 'admin':
+            api.abort(403, 'Admin access required')
+        metrics = current_app.extensions['password_hasher'].metrics()
+        metrics['rehash'] = current_app.extensions['password_rehasher'].stats()
+        return metrics, 200
+
+def _retry_after(e):
+    return {'Retry-After': str(e.retry_after)}
 
 # Keep the Blueprint for backward compatibility
 @bp.route('/register', methods=['POST'])
@@ -66,6 +99,8 @@ def register():
         return jsonify({'error': str(e), 'message': 'Email already exists'}), 400
     except IntegrityError:
         return jsonify({'error': 'Username or email already exists'}), 400
+    except ServiceUnavailableException as e:
+        return jsonify({'error': e.message}), e.status_code, _retry_after(e)
 
 @bp.route('/login', methods=['POST'])
 def login():
@@ -75,7 +110,16 @@ def login():
     if not data.get('password'):
         return jsonify({'error': 'Password is required'}), 401
     try:
-        token = AuthService().login_user(data['email'], data['password'])
-        return jsonify({'access_token': token}), 200
+        return jsonify(AuthService().login_user(data['email'], data['password'])), 200
     except ValueError as e:
-        return jsonify({'error': str(e)}), 401
\ No newline at end of file
+        return jsonify({'error': str(e)}), 401
+    except ServiceUnavailableException as e:
+        return jsonify({'error': e.message}), e.status_code, _retry_after(e)
+
+@bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    try:
+        return jsonify(AuthService().refresh_tokens(get_jwt_identity(), get_jwt())), 200
+    except UnauthorizedException as e:
+        return jsonify({'error': e.message}), e.status_code
@@ -1,10 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_restx import Namespace, Resource, fields
 from app.infrastructure.cart_repository import CartRepository
 from app.infrastructure.cart_item_repository import CartItemRepository
 from app.domain.cart import Cart
-from app.domain.cart_item import CartItem
-from app.mappers.cart_mapper import cart_to_response, cart_item_to_response
+from app.application.cart_service import CartService
+from app.dtos.requests.cart_requests import CartItemBatchRequest
+from app.mappers.cart_mapper import cart_delta_to_dict, cart_to_dict, priced_cart_to_dict
 
 bp = Blueprint('cart', __name__, url_prefix='/api/cart')
 api = Namespace('cart', description='Cart operations', path='/api/cart')
@@ -20,11 +21,40 @@ cart_item_model = api.model('CartItem', {
     'quantity': fields.Integer(required=True, description='Quantity'),
 })
 
+cart_item_operation_model = api.model('CartItemOperation', {
+    'op': fields.String(required=True, enum=['add', 'set', 'remove'], description='add merges, set replaces (0 removes)'),
+    'product_id': fields.Integer(required=True, description='Product ID'),
+    'quantity': fields.Integer(description='Units to add or set; not used by remove'),
+})
+
+cart_item_batch_model = api.model('CartItemBatch', {
+    'operations': fields.List(fields.Nested(cart_item_operation_model), required=True,
+                              description='Applied in order, all or nothing (at most 500)'),
+})
+
 cart_response = api.model('CartResponse', {
     'cart': fields.Raw(description='Cart object'),
 })
 
-@bp.route('/', methods=['POST'])
+cart_delta_response = api.model('CartDeltaResponse', {
+    'cart': fields.Raw(description='Cart id, new version and the changed line (view=delta)'),
+})
+
+priced_param = {'priced': {'description': 'Include unit prices, line totals, subtotal and stock flags',
+                           'type': 'boolean', 'default': False}}
+
+view_param = dict(priced_param, view={'description': "'delta' returns only the changed line and the cart version",
+                                      'enum': ['full', 'delta'], 'default': 'full'})
+
+def _delta_view():
+    return request.args.get('view', 'full') == 'delta'
+
+def _cart_body(cart):
+    if request.args.get('priced', 'false').lower() in ('1', 'true', 'yes'):
+        return {'cart': priced_cart_to_dict(cart, CartService().price_cart(cart))}
+    return {'cart': cart_to_dict(cart)}
+
+@api.route('/')
 class CartCreate(Resource):
     @api.expect(cart_model)
     @api.response(201, 'Cart created', model=cart_response)
@@ -32,37 +62,73 @@ class CartCreate(Resource):
         data = api.payload
         cart = Cart(user_id=data['user_id'])
         cart_repo.add_cart(cart)
-        return {'cart': cart_to_response(cart).__dict__}, 201
+        return {'cart': cart_to_dict(cart)}, 201
 
-@bp.route('/<int:cart_id>', methods=['GET'])
+@api.route('/<int:cart_id>')
 @api.param('cart_id', 'The cart identifier')
 class CartResource(Resource):
+    @api.doc(params=priced_param)
     @api.response(200, 'Success', model=cart_response)
     @api.response(404, 'Cart not found')
     def get(self, cart_id):
         cart = cart_repo.get_cart(cart_id)
         if not cart:
             api.abort(404, 'Cart not found')
-        return {'cart': cart_to_response(cart).__dict__}
+        return _cart_body(cart)
 
-@bp.route('/<int:cart_id>/items', methods=['POST'])
+@api.route('/<int:cart_id>/items')
 @api.param('cart_id', 'The cart identifier')
 class CartItemAdd(Resource):
     @api.expect(cart_item_model)
+    @api.doc(params=view_param)
     @api.response(200, 'Item added', model=cart_response)
+    @api.response(400, 'Invalid quantity')
+    @api.response(404, 'Cart not found')
     def post(self, cart_id):
+        """Add units of a product; an existing line for the product is merged into"""
         data = api.payload
-        cart_item = CartItem(cart_id=cart_id, product_id=data['product_id'], quantity=data['quantity'])
-        cart_item_repo.add_cart_item(cart_item)
+        if not isinstance(data.get('quantity'), int) or data['quantity'] < 1:
+            api.abort(400, 'Quantity must be a positive integer')
+        result = cart_item_repo.upsert_cart_item(cart_id, data['product_id'], data['quantity'])
+        if result is None:
+            api.abort(404, 'Cart not found')
+        cart_item, version = result
+        if _delta_view():
+            return {'cart': cart_delta_to_dict(cart_id, version, item=cart_item)}
         cart = cart_repo.get_cart(cart_id)
-        return {'cart': cart_to_response(cart).__dict__}
+        return _cart_body(cart)
+
+    @api.expect(cart_item_batch_model)
+    @api.doc(params=priced_param)
+    @api.response(200, 'Operations applied', model=cart_response)
+    @api.response(400, 'Invalid operations')
+    @api.response(404, 'Cart not found')
+    def patch(self, cart_id):
+        """Apply a list of add/set/remove operations atomically and return the final cart"""
+        try:
+            batch = CartItemBatchRequest(**api.payload)
+        except Exception as e:
+            api.abort(400, f"Invalid operations: {str(e)}")
+        operations = [operation.model_dump() for operation in batch.operations]
+        cart = cart_item_repo.apply_operations(cart_id, operations)
+        if cart is None:
+            api.abort(404, 'Cart not found')
+        return _cart_body(cart)
 
-@bp.route('/<int:cart_id>/items/<int:item_id>', methods=['DELETE'])
+@api.route('/<int:cart_id>/items/<int:item_id>')
 @api.param('cart_id', 'The cart identifier')
 @api.param('item_id', 'The item identifier')
 class CartItemRemove(Resource):
+    @api.doc(params=view_param)
     @api.response(200, 'Item removed', model=cart_response)
+    @api.response(404, 'Cart not found')
     def delete(self, cart_id, item_id):
-        cart_item_repo.remove_cart_item(item_id)
+        version = cart_item_repo.remove_cart_item(cart_id, item_id)
+        if version is None:
+            api.abort(404, 'Cart not found')
+        if _delta_view():
+            return {'cart': cart_delta_to_dict(cart_id, version, removed_item_id=item_id)}
         cart = cart_repo.get_cart(cart_id)
-        return {'cart': cart_to_response(cart).__dict__}
+        if not cart:
+            api.abort(404, 'Cart not found')
+        return _cart_body(cart)
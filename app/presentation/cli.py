@@ -0,0 +1,60 @@
+import json
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+
+from app.application.product_import import READERS
+from app.application.product_service import ProductService
+from app.application.sales_report_service import SalesReportService
+from app.infrastructure.metrics import LatencyStats
+from app.infrastructure.password_hasher import normalize_method
+
+
+@click.command('import-products')
+@click.argument('feed', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'feed_format', type=click.Choice(sorted(READERS)), default=None,
+              help='Feed format; guessed from the file extension when omitted.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per transaction.')
+@with_appcontext
+def import_products(feed, feed_format, chunk_size):
+    """Stream a product feed (NDJSON or CSV) into the catalog."""
+    if feed_format is None:
+        feed_format = 'csv' if feed.name.endswith('.csv') else 'ndjson'
+    report = ProductService().import_products(READERS[feed_format](feed), chunk_size=chunk_size)
+    click.echo(json.dumps(report.as_dict(), indent=2))
+
+
+@click.command('backfill-sales-rollups')
+@click.option('--chunk-size', default=10000, show_default=True, help='Order ids per transaction.')
+@with_appcontext
+def backfill_sales_rollups(chunk_size):
+    """Rebuild the daily sales rollups from the full order history."""
+    summary = SalesReportService().rebuild_rollups(chunk_size=chunk_size)
+    click.echo(json.dumps(summary, indent=2))
+
+
+@click.command('benchmark-password-hash')
+@click.option('--method', 'methods', multiple=True,
+              help='werkzeug hash method to time, e.g. scrypt:16384:8:1; repeatable. '
+                   'Defaults to PASSWORD_HASH_METHOD.')
+@click.option('--rounds', default=20, show_default=True, help='Hashes per method.')
+@with_appcontext
+def benchmark_password_hash(methods, rounds):
+    """Time one password hash per parameter set, to pick a cost that fits the login budget.
+
+    Hashes run one at a time on this machine, so the numbers are per-core
+    cost; queueing under load adds to them (see /api/auth/hash-metrics).
+    """
+    salt_length = current_app.config['PASSWORD_SALT_LENGTH']
+    results = []
+    for method in methods or [current_app.config['PASSWORD_HASH_METHOD']]:
+        stats = LatencyStats()
+        for _ in range(rounds):
+            started = time.perf_counter()
+            generate_password_hash('benchmark-password', method=method, salt_length=salt_length)
+            stats.observe(time.perf_counter() - started)
+        results.append(dict(stats.snapshot(), method=normalize_method(method)))
+    click.echo(json.dumps(results, indent=2))
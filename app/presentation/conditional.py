@@ -0,0 +1,40 @@
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date, parse_date
+
+
+def catalog_validators() -> Dict[str, str]:
+    """ETag and Last-Modified headers for the current catalog version.
+
+    The query string is folded into the ETag because filters, cursors and
+    page sizes select different representations of the same resource. The
+    stored modification time is rounded up, so Last-Modified is capped at
+    now; a date in the future would make If-Modified-Since hide later writes.
+    """
+    version, modified = current_app.extensions['catalog_version'].current()
+    variant = zlib.crc32(request.query_string) & 0xffffffff
+    return {
+        'ETag': f'"{version}-{variant:08x}"',
+        'Last-Modified': http_date(min(modified, datetime.now(timezone.utc))),
+        'Cache-Control': 'no-cache',
+    }
+
+
+def not_modified(headers: Dict[str, str]) -> Optional[Response]:
+    etag = headers['ETag'].strip('"')
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        return None
+    if request.if_modified_since:
+        last_modified = parse_date(headers['Last-Modified'])
+        # A Last-Modified in the current second may still be followed by
+        # writes in that same second, so it cannot vouch for the client's copy
+        current_second = datetime.now(timezone.utc).replace(microsecond=0)
+        if last_modified < current_second and last_modified <= request.if_modified_since:
+            return Response(status=304, headers=headers)
+    return None
@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from flask_restx import Namespace, Resource, fields
 
 from app.application.order_service import OrderService
+from app.dtos.exceptions import AppException, ServiceUnavailableException, ValidationException
+from app.dtos.requests.order_requests import OrderListQuery
+from app.presentation.product_controller import _get_user_role
+from app.presentation.streaming import streaming_response
 
 bp = Blueprint('order', __name__, url_prefix='/api/orders')
 api = Namespace('orders', description='Order operations', path='/api/orders')
@@ -15,8 +23,25 @@ order_model = api.model('Order', {
 order_response = api.model('OrderResponse', {
     'message': fields.String(description='Message'),
     'order_id': fields.Integer(description='Order ID'),
+    'status': fields.String(description="Order status; 'queued' when accepted for async processing"),
+    'status_url': fields.String(description='Where to poll for the outcome of a queued order'),
+})
+
+order_status = api.model('OrderStatus', {
+    'order_id': fields.Integer(description='Order ID'),
+    'status': fields.String(description='queued, pending, confirmed or rejected'),
 })
 
+checkout_model = api.model('Checkout', {
+    'cart_id': fields.Integer(required=False, description='Cart to check out; its items are cleared on success'),
+    'items': fields.List(fields.Nested(order_model), required=False, description='Explicit lines instead of a cart'),
+})
+
+idempotency_header = {'Idempotency-Key': {
+    'in': 'header',
+    'description': 'Retries with the same key replay the first response instead of placing another order',
+}}
+
 order_list_item = api.model('OrderListItem', {
     'id': fields.Integer(description='Order ID'),
     'product_id': fields.Integer(description='Product ID'),
@@ -24,44 +49,238 @@ order_list_item = api.model('OrderListItem', {
     'status': fields.String(description='Order status'),
 })
 
+def _place_order(identity, data):
+    intake = current_app.extensions.get('order_intake')
+    if intake is not None:
+        return _enqueue_order(intake, identity, data)
+    try:
+        order = OrderService().place_order(identity, data['product_id'], data['quantity'])
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return {'message': 'Order placed', 'order_id': order.id}, 201
+
+def _enqueue_order(intake, identity, data):
+    service = OrderService()
+    try:
+        order = service.enqueue_order(identity, data['product_id'], data['quantity'])
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if not intake.submit(order.id):
+        service.reject_orders([order.id])
+        raise ServiceUnavailableException("Order queue is full, retry shortly")
+    return {
+        'message': 'Order accepted',
+        'order_id': order.id,
+        'status': order.status,
+        'status_url': f'{bp.url_prefix}/{order.id}/status',
+    }, 202
+
+def _order_status(identity, order_id):
+    """Current status of one of the user's orders.
+
+    ``?wait=N`` long-polls for up to N seconds (max 30) while the order is
+    still queued.
+    """
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), 30)
+    except ValueError:
+        raise ValidationException("wait must be a number of seconds")
+    service = OrderService()
+    order = service.get_user_order(identity, order_id)
+    intake = current_app.extensions.get('order_intake')
+    if order.status == 'queued' and wait and intake is not None:
+        intake.start()
+        intake.wait(order_id, wait)
+        order = service.get_user_order(identity, order_id, refresh=True)
+    return {'order_id': order.id, 'status': order.status}
+
+def _retry_after(e):
+    return {'Retry-After': str(e.retry_after)}
+
+def _checkout(identity, data):
+    try:
+        if data.get('cart_id') is not None:
+            order = OrderService().checkout_cart(identity, data['cart_id'])
+        else:
+            lines = [(item['product_id'], item['quantity']) for item in data.get('items') or []]
+            order = OrderService().checkout(identity, lines)
+    except (KeyError, TypeError):
+        return {'error': 'Each item needs product_id and quantity'}, 400
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return {'message': 'Order placed', 'order_id': order.id}, 201
+
+def _idempotent(handler, identity, data):
+    """Run ``handler`` at most once per user and Idempotency-Key header.
+
+    Returns ``(body, status, headers)``; replays carry Idempotent-Replayed.
+    """
+    key = request.headers.get('Idempotency-Key')
+    if key is None:
+        body, status = handler(identity, data)
+        return body, status, {}
+    if not 0 < len(key) <= 255:
+        raise ValidationException("Idempotency-Key must be 1-255 characters")
+    fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+    store = current_app.extensions['idempotency_store']
+    (body, status), replayed = store.run(
+        (handler.__name__, str(identity), key), fingerprint, lambda: handler(identity, data)
+    )
+    return body, status, {'Idempotent-Replayed': 'true'} if replayed else {}
+
 @bp.route('', methods=['POST'])
 @jwt_required()
 def place_order():
     identity = get_jwt_identity()
     data = request.get_json()
     try:
-        order = OrderService().place_order(identity, data['product_id'], data['quantity'])
-        return jsonify({'message': 'Order placed', 'order_id': order.id}), 201
-    except ValueError as e:
-        return jsonify({'error': str(e)}), 400
+        body, status, headers = _idempotent(_place_order, identity, data)
+    except ServiceUnavailableException as e:
+        return jsonify({'error': e.message}), e.status_code, _retry_after(e)
+    except AppException as e:
+        return jsonify({'error': e.message}), e.status_code
+    return jsonify(body), status, headers
+
+@bp.route('/checkout', methods=['POST'])
+@jwt_required()
+def checkout():
+    identity = get_jwt_identity()
+    data = request.get_json()
+    try:
+        body, status, headers = _idempotent(_checkout, identity, data)
+    except AppException as e:
+        return jsonify({'error': e.message}), e.status_code
+    return jsonify(body), status, headers
+
+def _order_history(identity):
+    """Newest-first page of the user's orders, or a stream of all of them.
+
+    Returns a streaming Response, or the page as a list plus headers; the
+    next page is advertised in X-Next-Cursor and a Link header so the body
+    stays a plain list.
+    """
+    query = OrderListQuery(**request.args.to_dict())
+    if query.stream:
+        return streaming_response(OrderService().iter_user_orders(identity), query.stream)
+    page = OrderService().list_user_orders(identity, query.limit, query.cursor, query.status)
+    headers = {}
+    if page.next_cursor:
+        next_args = dict(request.args.to_dict(), cursor=page.next_cursor)
+        headers['X-Next-Cursor'] = page.next_cursor
+        headers['Link'] = f'<{request.path}?{urlencode(next_args)}>; rel="next"'
+    return page.items, headers
 
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_orders():
     identity = get_jwt_identity()
-    orders = OrderService().get_user_orders(identity)
-    return jsonify([{'id': o.id, 'product_id': o.product_id, 'quantity': o.quantity, 'status': o.status} for o in orders]), 200
+    try:
+        result = _order_history(identity)
+    except (ValueError, ValidationException) as e:
+        return jsonify({'error': str(e)}), 400
+    if not isinstance(result, tuple):
+        return result
+    orders, headers = result
+    return jsonify(orders), 200, headers
+
+@bp.route('/<int:order_id>/status', methods=['GET'])
+@jwt_required()
+def get_order_status(order_id):
+    identity = get_jwt_identity()
+    try:
+        return jsonify(_order_status(identity, order_id)), 200
+    except ValidationException as e:
+        return jsonify({'error': e.message}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
 
 @api.route('')
 class OrderList(Resource):
-    @api.doc('place_order')
+    @api.doc('place_order', params=idempotency_header)
     @api.expect(order_model)
     @api.response(201, 'Order placed', model=order_response)
+    @api.response(202, 'Order accepted for asynchronous processing', model=order_response)
     @api.response(400, 'Invalid input')
+    @api.response(503, 'Order queue is full; retry after the Retry-After delay')
     @jwt_required()
     def post(self):
         identity = get_jwt_identity()
-        data = api.payload
         try:
-            order = OrderService().place_order(identity, data['product_id'], data['quantity'])
-            return {'message': 'Order placed', 'order_id': order.id}, 201
-        except ValueError as e:
+            body, status, headers = _idempotent(_place_order, identity, api.payload)
+        except ServiceUnavailableException as e:
+            return {'message': e.message}, e.status_code, _retry_after(e)
+        except AppException as e:
+            api.abort(e.status_code, e.message)
+        if status >= 400:
+            api.abort(status, body['error'])
+        return body, status, headers
+
+    @api.doc('get_orders', params={
+        'limit': 'Page size (1-200, default 50)',
+        'cursor': 'Cursor from the X-Next-Cursor header of the previous page',
+        'status': 'Only orders with this status',
+        'stream': 'Stream all orders as a chunked json array or ndjson',
+    })
+    @api.response(200, 'Success', [order_list_item])
+    @jwt_required()
+    def get(self):
+        identity = get_jwt_identity()
+        try:
+            result = _order_history(identity)
+        except (ValueError, ValidationException) as e:
             api.abort(400, str(e))
+        if not isinstance(result, tuple):
+            return result
+        orders, headers = result
+        return orders, 200, headers
+
+@api.route('/checkout')
+class Checkout(Resource):
+    @api.doc('checkout', params=idempotency_header)
+    @api.expect(checkout_model)
+    @api.response(201, 'Order placed', model=order_response)
+    @api.response(400, 'Invalid input or insufficient stock')
+    @jwt_required()
+    def post(self):
+        identity = get_jwt_identity()
+        try:
+            body, status, headers = _idempotent(_checkout, identity, api.payload)
+        except AppException as e:
+            api.abort(e.status_code, e.message)
+        if status >= 400:
+            api.abort(status, body['error'])
+        return body, status, headers
+
+
+@api.route('/<int:order_id>/status')
+@api.param('order_id', 'The order identifier')
+class OrderStatus(Resource):
+    @api.doc('get_order_status', params={'wait': 'Seconds to long-poll while the order is queued (max 30)'})
+    @api.response(200, 'Success', model=order_status)
+    @api.response(404, 'Order not found')
+    @jwt_required()
+    def get(self, order_id):
+        identity = get_jwt_identity()
+        try:
+            return _order_status(identity, order_id), 200
+        except ValidationException as e:
+            api.abort(400, e.message)
+        except ValueError as e:
+            api.abort(404, str(e))
 
-    @api.doc('get_orders')
-    @api.marshal_list_with(order_list_item)
+@api.route('/intake/metrics')
+class OrderIntakeMetrics(Resource):
+    @api.doc('order_intake_metrics')
+    @api.response(200, 'Queue depth, outcome counts, latency percentiles and group commit stats')
     @jwt_required()
     def get(self):
         identity = get_jwt_identity()
-        orders = OrderService().get_user_orders(identity)
-        return [{'id': o.id, 'product_id': o.product_id, 'quantity': o.quantity, 'status': o.status} for o in orders], 200
+        user_role = _get_user_role(identity, get_jwt())
+        if user_role != 'admin':
+            api.abort(403, 'Admin access required')
+        intake = current_app.extensions.get('order_intake')
+        metrics = intake.metrics() if intake is not None else {'mode': 'sync'}
+        committer = current_app.extensions.get('order_group_commit')
+        if committer is not None:
+            metrics['group_commit'] = committer.stats()
+        return metrics, 200
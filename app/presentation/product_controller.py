@@ -1,14 +1,21 @@
+import io
 from typing import Dict, Any
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from flask_restx import Namespace, Resource, fields
 
+from app.application.product_import import READERS
 from app.application.product_service import ProductService
 from app.dtos.exceptions import ForbiddenException, NotFoundException, ValidationException
-from app.dtos.requests.product_requests import ProductCreateRequest, ProductUpdateRequest
+from app.dtos.requests.product_requests import (
+    ProductBulkUpdateRequest, ProductCreateRequest, ProductListQuery, ProductSearchQuery, ProductStockShardsRequest,
+    ProductUpdateRequest
+)
 from app.mappers.product_mapper import ProductMapper
+from app.presentation.conditional import catalog_validators, not_modified
+from app.presentation.streaming import streaming_response
 
 bp = Blueprint('product', __name__, url_prefix='/api/products')
 api = Namespace('products', description='Product operations', path='/api/products')
@@ -25,6 +32,27 @@ product_update_model = api.model('ProductUpdate', {
     'stock': fields.Integer(required=False, description='Product stock'),
 })
 
+bulk_update_model = api.model('ProductBulkUpdate', {
+    'patches': fields.List(fields.Raw, description='List of {id, price?, stock?} patches'),
+    'rule': fields.Raw(description='{price_percent?, stock_delta?, filters: {min_price?, max_price?, min_stock?, max_stock?, name_prefix?}}'),
+    'batch_size': fields.Integer(description='Rows (patches) or id range width (rule) per transaction'),
+})
+
+bulk_update_response = api.model('ProductBulkUpdateResponse', {
+    'affected': fields.Integer(description='Rows updated'),
+    'batches': fields.Integer(description='Transactions committed'),
+})
+
+stock_shards_model = api.model('ProductStockShards', {
+    'shards': fields.Integer(required=True, description='Stock counter shards (0-64); 0 turns sharding off'),
+})
+
+stock_shards_response = api.model('ProductStockShardsResponse', {
+    'product_id': fields.Integer(description='Product ID'),
+    'shards': fields.Integer(description='Stock counter shards'),
+    'stock': fields.Integer(description='Total stock, now spread over the shards'),
+})
+
 message_response = api.model('MessageResponse', {
     'message': fields.String(description='Message'),
     'product_id': fields.Integer(description='Product ID'),
@@ -49,12 +77,45 @@ def handle_forbidden_error(e):
 
 @api.route('')
 class ProductList(Resource):
-    @api.doc('list_products')
+    @api.doc('list_products', params={
+        'limit': 'Page size (1-200, default 50)',
+        'cursor': 'Opaque cursor returned as next_cursor by the previous page',
+        'sort': 'Sort key: id, price or name',
+        'count': 'Total to report: none (default), estimate or exact; exact runs a COUNT over every match',
+        'min_price': 'Minimum price',
+        'max_price': 'Maximum price',
+        'in_stock': 'Only products with stock available',
+        'name_prefix': 'Only products whose name starts with this prefix',
+        'stream': 'Stream every matching product as a chunked json array or ndjson (ignores limit and count)',
+        'ids': 'Comma-separated product ids (max 100); returns those products in order plus missing ids',
+    })
     @api.response(200, 'Success')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid query parameters')
     def get(self):
-        products = ProductService().get_products()
-        response = ProductMapper.to_list_response(products=products, total=len(products))
-        return response.model_dump(), 200
+        headers = catalog_validators()
+        cached = not_modified(headers)
+        if cached is not None:
+            return cached
+        try:
+            query = ProductListQuery(**request.args.to_dict())
+        except Exception as e:
+            api.abort(400, f"Invalid query parameters: {str(e)}")
+        if query.ids:
+            products, missing = ProductService().get_products_by_ids(query.ids)
+            return {'products': ProductMapper.states_to_dicts(products), 'missing': missing}, 200, headers
+        if query.stream:
+            filters = query.model_dump(exclude={'limit', 'count', 'stream', 'ids'})
+            try:
+                rows = ProductService().iter_products(**filters)
+            except ValidationException as e:
+                api.abort(400, e.message)
+            return streaming_response(rows, query.stream, headers)
+        try:
+            page = ProductService().list_products(**query.model_dump(exclude={'stream', 'ids'}))
+        except ValidationException as e:
+            api.abort(400, e.message)
+        return ProductMapper.to_page_dict(page), 200, headers
 
     @api.doc('create_product')
     @api.expect(product_model)
@@ -77,9 +138,98 @@ class ProductList(Resource):
         )
         return response.model_dump(), 201
 
+@api.route('/bulk')
+class ProductBulkUpdate(Resource):
+    @api.doc('bulk_update_products')
+    @api.expect(bulk_update_model)
+    @api.response(200, 'Products updated', model=bulk_update_response)
+    @api.response(400, 'Invalid bulk update')
+    @jwt_required()
+    def patch(self):
+        identity = get_jwt_identity()
+        user_role = _get_user_role(identity, get_jwt())
+        if user_role != 'admin':
+            api.abort(403, 'Admin access required')
+        try:
+            bulk_dto = ProductBulkUpdateRequest(**api.payload)
+        except Exception as e:
+            api.abort(400, f"Invalid bulk update: {str(e)}")
+        patches = [p.model_dump(exclude_none=True) for p in bulk_dto.patches] if bulk_dto.patches else None
+        rule = bulk_dto.rule.model_dump(exclude_none=True) if bulk_dto.rule else None
+        result = ProductService().bulk_update_products(patches=patches, rule=rule, batch_size=bulk_dto.batch_size)
+        return result, 200
+
+@api.route('/import')
+class ProductImport(Resource):
+    @api.doc('import_products', params={
+        'format': 'Feed format: ndjson or csv (defaults from Content-Type)',
+        'chunk_size': 'Rows validated and inserted per transaction (default 1000)',
+    })
+    @api.response(200, 'Import finished; see the per-row error report')
+    @api.response(400, 'Unsupported format')
+    @jwt_required()
+    def post(self):
+        identity = get_jwt_identity()
+        user_role = _get_user_role(identity, get_jwt())
+        if user_role != 'admin':
+            api.abort(403, 'Admin access required')
+        feed_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+        if feed_format not in READERS:
+            api.abort(400, f"Unsupported format: {feed_format}")
+        chunk_size = request.args.get('chunk_size', 1000, type=int)
+        if not 1 <= chunk_size <= 10000:
+            api.abort(400, 'chunk_size must be between 1 and 10000')
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8')
+        report = ProductService().import_products(READERS[feed_format](lines), chunk_size=chunk_size)
+        return report.as_dict(), 200
+
+@api.route('/search')
+class ProductSearch(Resource):
+    @api.doc('search_products', params={
+        'q': 'Search terms; each word also matches longer words it prefixes',
+        'limit': 'Maximum number of results (1-100, default 20)',
+    })
+    @api.response(200, 'Success')
+    @api.response(400, 'Invalid query parameters')
+    def get(self):
+        try:
+            query = ProductSearchQuery(**request.args.to_dict())
+        except Exception as e:
+            api.abort(400, f"Invalid query parameters: {str(e)}")
+        products, total = ProductService().search_products(query.q, query.limit)
+        response = ProductMapper.to_list_response(products=products, total=total)
+        return response.model_dump(), 200
+
+@api.route('/cache-stats')
+class ProductCacheStats(Resource):
+    @api.doc('product_cache_stats')
+    @api.response(200, 'Success')
+    @jwt_required()
+    def get(self):
+        identity = get_jwt_identity()
+        user_role = _get_user_role(identity, get_jwt())
+        if user_role != 'admin':
+            api.abort(403, 'Admin access required')
+        return current_app.extensions['product_cache'].stats(), 200
+
 @api.route('/<int:product_id>')
 @api.param('product_id', 'The product identifier')
 class ProductResource(Resource):
+    @api.doc('get_product')
+    @api.response(200, 'Success')
+    @api.response(304, 'Not modified')
+    @api.response(404, 'Product not found')
+    def get(self, product_id):
+        headers = catalog_validators()
+        cached = not_modified(headers)
+        if cached is not None:
+            return cached
+        try:
+            product = ProductService().get_product_by_id(product_id)
+        except NotFoundException:
+            api.abort(404, 'Product not found')
+        return ProductMapper.to_response(product).model_dump(), 200, headers
+
     @api.doc('update_product')
     @api.expect(product_update_model)
     @api.response(200, 'Product updated', model=message_response)
@@ -118,3 +268,26 @@ class ProductResource(Resource):
             message="Product deleted successfully"
         )
         return response.model_dump(), 200
+
+@api.route('/<int:product_id>/stock-shards')
+@api.param('product_id', 'The product identifier')
+class ProductStockShards(Resource):
+    @api.doc('set_product_stock_shards')
+    @api.expect(stock_shards_model)
+    @api.response(200, 'Stock resharded', model=stock_shards_response)
+    @api.response(404, 'Product not found')
+    @jwt_required()
+    def put(self, product_id):
+        identity = get_jwt_identity()
+        user_role = _get_user_role(identity, get_jwt())
+        if user_role != 'admin':
+            api.abort(403, 'Admin access required')
+        try:
+            shards_dto = ProductStockShardsRequest(**api.payload)
+        except Exception as e:
+            api.abort(400, f"Invalid shard count: {str(e)}")
+        try:
+            result = ProductService().set_stock_shards(product_id, shards_dto.shards)
+        except NotFoundException:
+            api.abort(404, 'Product not found')
+        return result, 200
@@ -0,0 +1,60 @@
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from flask_restx import Namespace, Resource, fields
+
+from app.application.sales_report_service import SalesReportService
+from app.dtos.requests.report_requests import SalesReportQuery
+from app.presentation.product_controller import _get_user_role
+
+api = Namespace('reports', description='Sales reports served from the daily rollups', path='/api/reports')
+
+daily_sales_model = api.model('DailySales', {
+    'day': fields.String(description='UTC day (YYYY-MM-DD)'),
+    'orders': fields.Integer(description='Orders placed'),
+    'units': fields.Integer(description='Units sold'),
+    'revenue': fields.String(description='Revenue as an exact decimal string'),
+})
+
+product_sales_model = api.model('DailyProductSales', {
+    'day': fields.String(description='UTC day (YYYY-MM-DD)'),
+    'product_id': fields.Integer(description='Product ID'),
+    'units': fields.Integer(description='Units sold'),
+    'revenue': fields.String(description='Revenue as an exact decimal string'),
+})
+
+report_params = {
+    'start': 'First day (YYYY-MM-DD)',
+    'end': 'Last day, inclusive (at most 366 days after start)',
+}
+
+def _report_query():
+    identity = get_jwt_identity()
+    if _get_user_role(identity, get_jwt()) != 'admin':
+        api.abort(403, 'Admin access required')
+    try:
+        return SalesReportQuery(**request.args.to_dict())
+    except Exception as e:
+        api.abort(400, f"Invalid report query: {str(e)}")
+
+@api.route('/sales/daily')
+class DailySalesReport(Resource):
+    @api.doc('daily_sales', params=report_params)
+    @api.response(200, 'Success', [daily_sales_model])
+    @jwt_required()
+    def get(self):
+        query = _report_query()
+        return SalesReportService().daily_sales(query.start, query.end), 200
+
+@api.route('/sales/products')
+class ProductSalesReport(Resource):
+    @api.doc('product_sales', params=dict(
+        report_params,
+        product_id='Only this product',
+        limit='Maximum rows (1-10000, default 1000)',
+    ))
+    @api.response(200, 'Success', [product_sales_model])
+    @jwt_required()
+    def get(self):
+        query = _report_query()
+        rows = SalesReportService().product_sales(query.start, query.end, query.product_id, query.limit)
+        return rows, 200
@@ -0,0 +1,47 @@
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+from flask import Response, stream_with_context
+
+MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows are encoded one at a time but flushed in groups to keep chunk overhead low
+ROWS_PER_CHUNK = 256
+
+
+def _encode_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(row, separators=(',', ':')))
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+def _encode_json_array(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    yield '['
+    separator = ''
+    buffer = []
+    for row in rows:
+        buffer.append(separator + json.dumps(row, separators=(',', ':')))
+        separator = ','
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ''.join(buffer)
+            buffer = []
+    buffer.append(']')
+    yield ''.join(buffer)
+
+
+def streaming_response(rows: Iterable[Dict[str, Any]], mode: str, headers: Dict[str, str] = None) -> Response:
+    """Send ``rows`` as a chunked JSON array (``json``) or one object per line (``ndjson``)."""
+    encoder = _encode_ndjson if mode == 'ndjson' else _encode_json_array
+    return Response(
+        stream_with_context(encoder(rows)),
+        mimetype=MIMETYPES[mode],
+        headers=headers
+    )
@@ -0,0 +1,99 @@
+"""Orders/sec of per-order commits versus group commit.
+
+Each client thread places single-unit orders as fast as it can for a fixed
+duration. Uses a file-backed SQLite database by default so every commit
+pays for a real fsync; pass --database-url to measure another server.
+That database is wiped (its user, product, orders and rollup tables are
+dropped and recreated), so its name must contain "bench".
+
+    python -m benchmarks.order_commit --clients 1 8 64 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from app import create_app, db  # noqa: E402
+from app.application.order_service import OrderService  # noqa: E402
+from app.domain.order import Order  # noqa: E402
+from app.domain.product import Product  # noqa: E402
+from app.domain.sales_rollup import DailyProductSales, DailySales  # noqa: E402
+from app.domain.user import User  # noqa: E402
+
+
+def make_app(database_url, group_commit, window_ms):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}} if database_url.startswith('sqlite') else {},
+        'ORDER_GROUP_COMMIT': group_commit,
+        'ORDER_GROUP_COMMIT_WINDOW_MS': window_ms,
+    })
+    with app.app_context():
+        tables = [User.__table__, Product.__table__, Order.__table__, DailySales.__table__, DailyProductSales.__table__]
+        db.metadata.drop_all(db.engine, tables=tables)
+        db.metadata.create_all(db.engine, tables=tables)
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('Bench@1234')
+        product = Product(name='Benchmark', price=1.0, stock=10 ** 9)
+        db.session.add_all([user, product])
+        db.session.commit()
+        return app, user.id, product.id
+
+
+def is_benchmark_database(database_url):
+    """Only databases named for benchmarking may have their tables dropped."""
+    return 'bench' in (make_url(database_url).database or '').lower()
+
+
+def measure(app, user_id, product_id, clients, seconds):
+    placed = [0] * clients
+    stop = threading.Event()
+
+    def client(n):
+        while not stop.is_set():
+            with app.app_context():
+                OrderService().place_order(user_id, product_id, 1)
+            placed[n] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(placed) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--window-ms', type=float, default=3)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+    if args.database_url and not is_benchmark_database(args.database_url):
+        parser.error('--database-url must name a dedicated benchmark database (containing "bench"); '
+                     'its tables are dropped')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench_orders.db')}"
+        print(f"{'clients':>8} {'per-order':>14} {'group commit':>14} {'speedup':>8}")
+        for clients in args.clients:
+            rates = []
+            for group_commit in (False, True):
+                app, user_id, product_id = make_app(database_url, group_commit, args.window_ms)
+                rates.append(measure(app, user_id, product_id, clients, args.seconds))
+                with app.app_context():
+                    db.engine.dispose()
+            print(f"{clients:>8} {rates[0]:>10,.0f}/sec {rates[1]:>10,.0f}/sec {rates[1] / rates[0]:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Rows/sec of the product list serialization paths.
+
+Compares the ORM path (hydrate Product objects, then model_validate each one)
+with the column-row fast path used by GET /api/products. Runs against an
+in-memory SQLite database whatever DATABASE_URL says, since it creates and
+fills the product table.
+
+    python -m benchmarks.product_serialization --rows 50000
+"""
+import argparse
+import time
+
+from app import create_app, db
+from app.domain.product import Product
+from app.infrastructure.product_repository import ProductRepository
+from app.mappers.product_mapper import ProductMapper
+
+
+def orm_path(limit):
+    db.session.expunge_all()
+    products = Product.query.order_by(Product.id).limit(limit).all()
+    return ProductMapper.to_list_response(products=products, total=len(products)).model_dump()
+
+
+def fast_path(limit):
+    rows = ProductRepository().find_product_rows_page(limit)
+    return {'products': ProductMapper.rows_to_dicts(rows), 'total': len(rows)}
+
+
+def measure(path, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        path(rows)
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        Product.__table__.create(db.engine, checkfirst=True)
+        db.session.execute(db.insert(Product), [
+            {'name': f'Product {i}', 'price': round(1 + i * 0.01, 2), 'stock': i % 100}
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        assert orm_path(10)['products'] == fast_path(10)['products']
+        for name, path in (('orm + model_validate', orm_path), ('column rows + TypeAdapter', fast_path)):
+            print(f"{name:28} {measure(path, args.rows, args.repeat):>12,.0f} rows/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Add sharded stock counters for hot products
+
+Revision ID: 5e7a0c3b9d24
+Revises: d21a6f93c0b8
+Create Date: 2026-10-18 14:22:45.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7a0c3b9d24'
+down_revision = 'd21a6f93c0b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_stock_shards',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'shard')
+    )
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_column('stock_shards')
+
+    op.drop_table('product_stock_shards')
@@ -0,0 +1,23 @@
+"""Rename the order table to orders
+
+Revision ID: 6b2d8f4a1c37
+Revises: 3f9a1c2d7e41
+Create Date: 2026-10-18 11:02:10.418306
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2d8f4a1c37'
+down_revision = '3f9a1c2d7e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.rename_table('order', 'orders')
+
+
+def downgrade():
+    op.rename_table('orders', 'order')
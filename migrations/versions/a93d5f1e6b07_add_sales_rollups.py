@@ -0,0 +1,51 @@
+"""Add daily sales rollups and order timestamps
+
+Revision ID: a93d5f1e6b07
+Revises: 5e7a0c3b9d24
+Create Date: 2026-10-18 15:37:12.904551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d5f1e6b07'
+down_revision = '5e7a0c3b9d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_daily_product',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    with op.batch_alter_table('sales_daily_product', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_daily_product_product_id_day', ['product_id', 'day'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('unit_price')
+        batch_op.drop_column('created_at')
+
+    with op.batch_alter_table('sales_daily_product', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_daily_product_product_id_day')
+
+    op.drop_table('sales_daily_product')
+    op.drop_table('sales_daily')
@@ -0,0 +1,27 @@
+"""Add order history indexes
+
+Revision ID: d21a6f93c0b8
+Revises: 8c4e2b7f5a19
+Create Date: 2026-10-18 12:41:07.352981
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd21a6f93c0b8'
+down_revision = '8c4e2b7f5a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_orders_user_id_status', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_id_status')
+        batch_op.drop_index('ix_orders_user_id_id')
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 import pytest
 
 from app import create_app, db
@@ -113,3 +115,89 @@ def test_login_missing_credentials(client):
     response = client.post('/api/auth/login', json={'email': TEST_USER['email']})
     assert response.status_code == 401
     assert 'password is required' in response.json['error'].lower()
+
+def test_login_rejected_when_hashing_saturated(client, app):
+    from app.infrastructure.password_hasher import PasswordHasher
+    client.post('/api/auth/register', json=TEST_USER)
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    app.extensions['password_hasher'] = hasher
+    hasher._slots.acquire()
+    response = client.post('/api/auth/login', json={'email': TEST_USER['email'], 'password': TEST_USER['password']})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    hasher._slots.release()
+    response = client.post('/api/auth/login', json={'email': TEST_USER['email'], 'password': TEST_USER['password']})
+    assert response.status_code == 200
+    metrics = hasher.metrics()
+    assert (metrics['rejected'], metrics['pending'], metrics['hash_time']['count']) == (1, 0, 1)
+
+def test_refresh_rotates_tokens(client):
+    client.post('/api/auth/register', json=TEST_USER)
+    response = client.post('/api/auth/login', json={'email': TEST_USER['email'], 'password': TEST_USER['password']})
+    refresh_token = response.json['refresh_token']
+
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 200
+    assert response.json['refresh_token'] != refresh_token
+    access_token = response.json['access_token']
+    response = client.get('/api/orders', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 401
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code in (401, 422)
+
+def test_revocation_list_forgets_expired_tokens():
+    from app.infrastructure.token_revocation import InMemoryTokenRevocationList
+    now = [1000.0]
+    revocations = InMemoryTokenRevocationList(clock=lambda: now[0])
+    assert revocations.revoke('a', 1010) and not revocations.revoke('a', 1010)
+    assert revocations.revoke('b', 1100)
+    now[0] = 1050
+    assert not revocations.is_revoked('a') and revocations.is_revoked('b')
+    revocations.revoke('c', 1100)
+    assert len(revocations) == 2
+
+def test_login_rehashes_outdated_password_hash(client, app):
+    from werkzeug.security import generate_password_hash
+    user = User(username=TEST_USER['username'], email=TEST_USER['email'])
+    user.password_hash = generate_password_hash(TEST_USER['password'], method='pbkdf2:sha256:1000')
+    db.session.add(user)
+    db.session.commit()
+    credentials = {'email': TEST_USER['email'], 'password': TEST_USER['password']}
+
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    rehasher = app.extensions['password_rehasher']
+    rehasher.join()
+    db.session.expire_all()
+    assert db.session.get(User, user.id).password_hash.startswith('scrypt:32768:8:1$')
+    assert rehasher.stats()['rehashed'] == 1
+
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    rehasher.join()
+    assert rehasher.stats()['rehashed'] == 1
+
+def test_refresh_uses_current_user_and_session_limit(client, app):
+    client.post('/api/auth/register', json=TEST_USER)
+    credentials = {'email': TEST_USER['email'], 'password': TEST_USER['password']}
+    refresh_token = client.post('/api/auth/login', json=credentials).json['refresh_token']
+
+    user = User.query.filter_by(email=TEST_USER['email']).one()
+    user.role = 'admin'
+    db.session.commit()
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 200
+    from flask_jwt_extended import decode_token
+    assert decode_token(response.json['access_token'])['role'] == 'admin'
+    refresh_token = response.json['refresh_token']
+
+    app.config['JWT_SESSION_MAX_AGE'] = timedelta(seconds=0)
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 401
+
+    app.config['JWT_SESSION_MAX_AGE'] = timedelta(days=1)
+    db.session.delete(user)
+    db.session.commit()
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 401
@@ -113,18 +113,154 @@ def test_add_duplicate_cart_item(client, app):
     assert response.status_code == 200
     assert len(response.json['cart']['items']) >= 1
 
+def test_add_cart_item_merges_lines_and_returns_delta(client, app):
+    user_id = app.config['TEST_USER_ID']
+    product_id = app.config['TEST_PRODUCT_ID']
+    response = client.post('/api/cart/', json={'user_id': user_id})
+    cart_id = response.json['cart']['id']
+    client.post(f'/api/cart/{cart_id}/items', json={'product_id': product_id, 'quantity': 1})
+    response = client.post(f'/api/cart/{cart_id}/items?view=delta', json={'product_id': product_id, 'quantity': 2})
+    assert response.status_code == 200
+    assert response.json['cart']['version'] == 2
+    assert response.json['cart']['item']['quantity'] == 3
+    assert 'items' not in response.json['cart']
+    item_id = response.json['cart']['item']['id']
+    response = client.get(f'/api/cart/{cart_id}')
+    assert [item['quantity'] for item in response.json['cart']['items']] == [3]
+    response = client.delete(f'/api/cart/{cart_id}/items/{item_id}?view=delta')
+    assert response.json['cart'] == {'cart_id': cart_id, 'version': 3, 'removed_item_id': item_id}
+    response = client.post(f'/api/cart/{cart_id}/items', json={'product_id': product_id, 'quantity': 0})
+    assert response.status_code == 400
+
+def test_get_priced_cart(client, app):
+    user_id = app.config['TEST_USER_ID']
+    product_id = app.config['TEST_PRODUCT_ID']
+    response = client.post('/api/cart/', json={'user_id': user_id})
+    cart_id = response.json['cart']['id']
+    client.post(f'/api/cart/{cart_id}/items', json={'product_id': product_id, 'quantity': 3})
+    client.post(f'/api/cart/{cart_id}/items', json={'product_id': 9999, 'quantity': 1})
+    response = client.get(f'/api/cart/{cart_id}?priced=true')
+    assert response.status_code == 200
+    cart = response.json['cart']
+    assert cart['subtotal'] == '8.97'
+    assert cart['units'] == 4 and cart['all_in_stock'] is False
+    priced, missing = cart['items']
+    assert (priced['unit_price'], priced['line_total'], priced['in_stock']) == ('2.99', '8.97', True)
+    assert (missing['unit_price'], missing['in_stock']) == (None, False)
+    assert 'subtotal' not in client.get(f'/api/cart/{cart_id}').json['cart']
+
+def test_batch_cart_item_operations(client, app):
+    user_id = app.config['TEST_USER_ID']
+    product_id = app.config['TEST_PRODUCT_ID']
+    response = client.post('/api/cart/', json={'user_id': user_id})
+    cart_id = response.json['cart']['id']
+    client.post(f'/api/cart/{cart_id}/items', json={'product_id': 9999, 'quantity': 1})
+    response = client.patch(f'/api/cart/{cart_id}/items', json={'operations': [
+        {'op': 'add', 'product_id': product_id, 'quantity': 2},
+        {'op': 'add', 'product_id': product_id, 'quantity': 3},
+        {'op': 'set', 'product_id': 42, 'quantity': 4},
+        {'op': 'remove', 'product_id': 9999},
+    ]})
+    assert response.status_code == 200
+    assert response.json['cart']['version'] == 2
+    assert [(item['product_id'], item['quantity']) for item in response.json['cart']['items']] == [
+        (product_id, 5), (42, 4)
+    ]
+    response = client.patch(f'/api/cart/{cart_id}/items', json={'operations': [
+        {'op': 'set', 'product_id': 42, 'quantity': 0},
+        {'op': 'add', 'product_id': product_id},
+    ]})
+    assert response.status_code == 400
+    assert len(client.get(f'/api/cart/{cart_id}').json['cart']['items']) == 2
+    response = client.patch('/api/cart/9999/items', json={'operations': [{'op': 'remove', 'product_id': 1}]})
+    assert response.status_code == 404
+
 def test_clear_cart(client, app):
     user_id = app.config['TEST_USER_ID']
     product_id = app.config['TEST_PRODUCT_ID']
     response = client.post('/api/cart/', json={'user_id': user_id})
     cart_id = response.json['cart']['id']
     client.post(f'/api/cart/{cart_id}/items', json={'product_id': product_id, 'quantity': 2})
-    from app.domain.cart import Cart
-    from app import db
-    cart = db.session.get(Cart, cart_id)
-    for item in list(cart.items):
-        db.session.delete(item)
-    db.session.commit()
+    from app.infrastructure.cart_item_repository import CartItemRepository
+    with app.app_context():
+        CartItemRepository().clear_cart(cart_id)
     response = client.get(f'/api/cart/{cart_id}')
     assert response.status_code == 200
     assert response.json['cart']['items'] == []
+
+def test_cart_store_ttl_and_lru_eviction():
+    from app.infrastructure.cart_store import InMemoryCartStore
+    now = [1000.0]
+    store = InMemoryCartStore(ttl=60, maxsize=2, clock=lambda: now[0])
+    first, second = store.create(1), store.create(1)
+    store.get(first['id'])
+    third = store.create(2)
+    assert store.get(second['id']) is None
+    assert [cart['id'] for cart in store.find_by_user(1)] == [first['id']]
+    now[0] += 61
+    assert store.get(third['id']) is None
+    assert store.stats()['evicted'] == 1 and store.stats()['expired'] >= 1
+
+def test_cart_reaper_deletes_idle_carts_in_batches():
+    from app.infrastructure.cart_reaper import CartReaper
+    from app.infrastructure.cart_store import InMemoryCartStore
+    now = [1000.0]
+    store = InMemoryCartStore(ttl=60, clock=lambda: now[0])
+    idle = [store.create(1)['id'] for _ in range(5)]
+    now[0] += 30
+    active = store.create(1)['id']
+    store.get(idle[0])
+    now[0] += 31
+    reaper = CartReaper(store, batch_size=2, pause=0)
+    assert reaper.reap() == {'reclaimed': 5, 'batches': 3, 'seconds': reaper.last_run['seconds']}
+    assert len(store) == 1 and store.get(active) is not None
+    assert reaper.reap()['reclaimed'] == 0
+    assert reaper.stats()['reclaimed'] == 5
+
+def test_cart_store_log_replay(tmp_path):
+    from app.infrastructure.cart_store import CartLog, InMemoryCartStore
+    path = str(tmp_path / 'carts.log')
+    store = InMemoryCartStore(log=CartLog(path, snapshot_every=3))
+    cart = store.create(7)
+    store.update(cart['id'], lambda c: c['items'].append({'id': 1, 'product_id': 5, 'quantity': 2}))
+    gone = store.create(7)
+    store.delete(gone['id'])
+    store.update(cart['id'], lambda c: c['items'][0].update(quantity=4))
+    store.log.close()
+
+    restored = InMemoryCartStore(log=CartLog(path))
+    assert restored.get(cart['id'])['items'] == [{'id': 1, 'product_id': 5, 'quantity': 4}]
+    assert restored.get(cart['id'])['version'] == 2
+    assert restored.get(gone['id']) is None
+    assert restored.create(7)['id'] == gone['id'] + 1
+
+def test_cart_store_log_drops_expired_and_evicted_carts(tmp_path):
+    from app.infrastructure.cart_store import CartLog, InMemoryCartStore
+    path = str(tmp_path / 'carts.log')
+    now = [1000.0]
+    store = InMemoryCartStore(ttl=60, maxsize=3, log=CartLog(path), clock=lambda: now[0])
+    idle = store.create(1)
+    now[0] += 30
+    evicted, kept = store.create(2), store.create(3)
+    now[0] += 31
+    assert store.reap(10) == 1
+    store.get(kept['id'])
+    store.create(4)
+    store.create(5)
+    assert store.get(evicted['id']) is None
+    store.log.close()
+
+    now[0] = 0
+    restored = InMemoryCartStore(ttl=60, log=CartLog(path), clock=lambda: now[0])
+    assert restored.get(idle['id']) is None
+    assert restored.get(evicted['id']) is None
+    assert restored.get(kept['id']) is not None
+
+def test_cart_reaper_starts_with_first_request_outside_testing(app, client):
+    client.get('/api/cart/1')
+    assert app.extensions['cart_reaper']._thread is None
+
+    live_app = create_app()
+    assert live_app.extensions['cart_reaper']._thread is None
+    live_app.test_client().get('/api/cart/1')
+    assert live_app.extensions['cart_reaper']._thread is not None
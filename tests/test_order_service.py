@@ -1,11 +1,21 @@
+import json
+import threading
+import time
 from http import HTTPStatus
 
 import pytest
 from flask_jwt_extended import create_access_token, JWTManager
 
 from app import create_app, db
+from app.application.order_service import OrderService
+from app.application.product_service import ProductService
+from app.application.sales_report_service import SalesReportService
+from app.domain.order import Order
 from app.domain.product import Product
+from app.domain.product_stock_shard import ProductStockShard
+from app.domain.sales_rollup import DailyProductSales, DailySales
 from app.domain.user import User
+from app.infrastructure.product_repository import ProductRepository
 
 TEST_USER = {
     'username': 'testuser',
@@ -148,3 +158,403 @@ class TestOrderEndpoints:
         assert order['product_id'] == product_id
         assert order['quantity'] == 1
         assert order['status'] == 'pending'
+
+    def test_get_orders_streaming(self, client, app):
+        headers = get_auth_headers(app)
+        product_id = app.config['TEST_PRODUCT_ID']
+        for _ in range(2):
+            client.post('/api/orders', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+
+        response = client.get('/api/orders?stream=ndjson', headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [o['quantity'] for o in lines] == [1, 1]
+
+        response = client.get('/api/orders?stream=json', headers=headers)
+        assert len(response.get_json()) == 2
+
+        response = client.get('/api/orders?stream=xml', headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_checkout_multiple_lines(self, client, app):
+        headers = get_auth_headers(app)
+        book_id = app.config['TEST_PRODUCT_ID']
+        with app.app_context():
+            pen = Product(name='Pen', price=1.5, stock=10)
+            db.session.add(pen)
+            db.session.commit()
+            pen_id = pen.id
+
+        response = client.post(
+            '/api/orders/checkout',
+            json={'items': [
+                {'product_id': pen_id, 'quantity': 3},
+                {'product_id': book_id, 'quantity': 2},
+                {'product_id': pen_id, 'quantity': 1},
+            ]},
+            headers=headers
+        )
+
+        assert response.status_code == HTTPStatus.CREATED
+        with app.app_context():
+            order = db.session.get(Order, response.get_json()['order_id'])
+            assert order.quantity == 6
+            assert sorted((i.product_id, i.quantity, i.unit_price) for i in order.items) == sorted(
+                [(pen_id, 4, 1.5), (book_id, 2, TEST_PRODUCT['price'])]
+            )
+            assert db.session.get(Product, pen_id).stock == 6
+            assert db.session.get(Product, book_id).stock == 3
+
+    def test_checkout_insufficient_stock_rolls_back(self, client, app):
+        headers = get_auth_headers(app)
+        book_id = app.config['TEST_PRODUCT_ID']
+        with app.app_context():
+            pen = Product(name='Pen', price=1.5, stock=10)
+            db.session.add(pen)
+            db.session.commit()
+            pen_id = pen.id
+
+        response = client.post(
+            '/api/orders/checkout',
+            json={'items': [
+                {'product_id': pen_id, 'quantity': 2},
+                {'product_id': book_id, 'quantity': 50},
+            ]},
+            headers=headers
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.get_json()['error'] == f'Insufficient stock for product(s): {book_id}'
+        with app.app_context():
+            assert db.session.get(Product, pen_id).stock == 10
+            assert Order.query.count() == 0
+
+        response = client.post('/api/orders/checkout', json={'items': []}, headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_checkout_cart_clears_cart(self, client, app):
+        headers = get_auth_headers(app)
+        product_id = app.config['TEST_PRODUCT_ID']
+        cart_id = client.post('/api/cart/', json={'user_id': app.config['TEST_USER_ID']}).get_json()['cart']['id']
+        client.post(f'/api/cart/{cart_id}/items', json={'product_id': product_id, 'quantity': 2})
+        response = client.post('/api/orders/checkout', json={'cart_id': cart_id}, headers=headers)
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get(f'/api/cart/{cart_id}').get_json()['cart']['items'] == []
+        with app.app_context():
+            assert db.session.get(Product, product_id).stock == TEST_PRODUCT['stock'] - 2
+
+    def test_get_orders_paginated_newest_first(self, client, app):
+        headers = get_auth_headers(app)
+        product_id = app.config['TEST_PRODUCT_ID']
+        order_ids = [
+            client.post('/api/orders', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+            .get_json()['order_id']
+            for _ in range(3)
+        ]
+        with app.app_context():
+            db.session.get(Order, order_ids[1]).status = 'shipped'
+            db.session.commit()
+
+        response = client.get('/api/orders?limit=2', headers=headers)
+        assert [o['id'] for o in response.get_json()] == [order_ids[2], order_ids[1]]
+        cursor = response.headers['X-Next-Cursor']
+        assert 'rel="next"' in response.headers['Link']
+
+        response = client.get(f'/api/orders?limit=2&cursor={cursor}', headers=headers)
+        assert [o['id'] for o in response.get_json()] == [order_ids[0]]
+        assert 'X-Next-Cursor' not in response.headers
+
+        response = client.get('/api/orders?status=shipped', headers=headers)
+        assert [o['id'] for o in response.get_json()] == [order_ids[1]]
+
+        response = client.get('/api/orders?cursor=garbage', headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_place_order_idempotent_replay(self, client, app):
+        headers = dict(get_auth_headers(app), **{'Idempotency-Key': 'retry-1'})
+        product_id = app.config['TEST_PRODUCT_ID']
+        payload = {'product_id': product_id, 'quantity': 2}
+
+        first = client.post('/api/orders', json=payload, headers=headers)
+        replay = client.post('/api/orders', json=payload, headers=headers)
+
+        assert first.status_code == replay.status_code == HTTPStatus.CREATED
+        assert replay.get_json()['order_id'] == first.get_json()['order_id']
+        assert replay.headers['Idempotent-Replayed'] == 'true'
+        with app.app_context():
+            assert Order.query.count() == 1
+            assert db.session.get(Product, product_id).stock == TEST_PRODUCT['stock'] - 2
+
+        response = client.post('/api/orders', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_idempotency_store_concurrent_duplicates_wait():
+    from app.infrastructure.idempotency import InMemoryIdempotencyStore
+    store = InMemoryIdempotencyStore(wait_timeout=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'order-1'
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(store.run('k', 'fp', slow)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(store.run('k', 'fp', slow)))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('order-1', False), ('order-1', True)]
+
+
+def test_idempotency_store_retries_after_failure():
+    from app.infrastructure.idempotency import InMemoryIdempotencyStore
+    store = InMemoryIdempotencyStore()
+
+    def boom():
+        raise RuntimeError('db down')
+
+    with pytest.raises(RuntimeError):
+        store.run('k', 'fp', boom)
+    assert store.run('k', 'fp', lambda: 'ok') == ('ok', False)
+
+
+def test_idempotency_store_purges_past_in_flight_entries():
+    from app.infrastructure.idempotency import InMemoryIdempotencyStore, _Entry
+    now = [0.0]
+    store = InMemoryIdempotencyStore(ttl=10, maxsize=1, clock=lambda: now[0])
+    store._entries['in-flight'] = _Entry('fp')
+    store.run('old', 'fp', lambda: 1)
+    now[0] = 11
+    store.run('new', 'fp', lambda: 2)
+    assert list(store._entries) == ['in-flight', 'new']
+    store.run('newer', 'fp', lambda: 3)
+    assert list(store._entries) == ['in-flight', 'newer']
+
+
+def test_group_commit_hands_off_leadership(app):
+    from collections import Counter
+    from app.infrastructure.group_commit import GroupCommitter
+    committer = GroupCommitter(window=0.001, max_batch=2)
+    release = threading.Event()
+    entered = []
+    executed_by = Counter()
+
+    def unit():
+        release.wait(5)
+        executed_by[threading.get_ident()] += 1
+
+    def client():
+        with app.app_context():
+            entered.append(1)
+            committer.run(unit)
+
+    threads = [threading.Thread(target=client) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    # Sustained load: every caller has arrived while the first group is still running
+    while len(entered) < 12:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert committer.stats()['units'] == 12
+    # Each thread leads at most one group of max_batch units
+    assert max(executed_by.values()) <= 2
+
+
+@pytest.mark.parametrize('group_commit, shards', [(False, 0), (True, 0), (False, 4)])
+def test_place_order_concurrent_no_oversell(tmp_path, group_commit, shards):
+    stress_app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'stress.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'ORDER_GROUP_COMMIT': group_commit,
+        'STOCK_RECONCILE_INTERVAL': 0.01,
+    })
+    stock, threads, attempts = 50, 16, 10
+    with stress_app.app_context():
+        db.metadata.create_all(db.engine, tables=[
+            User.__table__, Product.__table__, ProductStockShard.__table__, Order.__table__,
+            DailySales.__table__, DailyProductSales.__table__
+        ])
+        user = User(username='stress', email='stress@test.com')
+        user.set_password('Test@1234')
+        product = Product(name='Flash Sale', price=9.99, stock=stock)
+        db.session.add_all([user, product])
+        db.session.commit()
+        user_id, product_id = user.id, product.id
+        if shards:
+            ProductService().set_stock_shards(product_id, shards)
+
+    results = {'placed': 0, 'rejected': 0}
+    lock = threading.Lock()
+
+    def hammer():
+        for _ in range(attempts):
+            with stress_app.app_context():
+                try:
+                    order = OrderService().place_order(user_id, product_id, 1)
+                    assert order.id and order.status == 'pending'
+                    outcome = 'placed'
+                except ValueError:
+                    outcome = 'rejected'
+            with lock:
+                results[outcome] += 1
+
+    workers = [threading.Thread(target=hammer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with stress_app.app_context():
+        stress_app.extensions['stock_reconciler'].reconcile()
+        assert results == {'placed': stock, 'rejected': threads * attempts - stock}
+        assert db.session.get(Product, product_id).stock == 0
+        assert Order.query.count() == stock
+
+
+def test_async_intake_confirms_and_rejects(tmp_path):
+    async_app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'intake.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'JWT_SECRET_KEY': 'test-secret-key',
+        'ORDER_INTAKE_MODE': 'async',
+        'ORDER_WORKERS': 2,
+    })
+    with async_app.app_context():
+        db.metadata.create_all(db.engine, tables=[
+            User.__table__, Product.__table__, Order.__table__, DailySales.__table__, DailyProductSales.__table__
+        ])
+        user = User(username='async', email='async@test.com')
+        user.set_password('Test@1234')
+        product = Product(name='Flash Sale', price=9.99, stock=3)
+        db.session.add_all([user, product])
+        db.session.commit()
+        product_id = product.id
+        headers = {'Authorization': f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    client = async_app.test_client()
+    intake = async_app.extensions['order_intake']
+    try:
+        order_ids = []
+        for _ in range(5):
+            response = client.post('/api/orders', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+            assert response.status_code == HTTPStatus.ACCEPTED
+            assert response.get_json()['status'] == 'queued'
+            order_ids.append(response.get_json()['order_id'])
+
+        statuses = [
+            client.get(f'/api/orders/{order_id}/status?wait=5', headers=headers).get_json()['status']
+            for order_id in order_ids
+        ]
+        # Two workers may commit separate single-order batches in either order
+        assert sorted(statuses) == ['confirmed'] * 3 + ['rejected'] * 2
+        # Statuses are committed just before the workers count them
+        for order_id in order_ids:
+            intake.wait(order_id, 5)
+        metrics = intake.metrics()
+        assert (metrics['confirmed'], metrics['rejected'], metrics['queue_depth']) == (3, 2, 0)
+        assert metrics['order_latency']['count'] == 5
+
+        response = client.post('/api/orders', json={'product_id': 999, 'quantity': 1}, headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+    finally:
+        intake.stop(timeout=5)
+    with async_app.app_context():
+        assert db.session.get(Product, product_id).stock == 0
+
+
+def test_queued_orders_are_processed_once(app):
+    with app.app_context():
+        product_id = app.config['TEST_PRODUCT_ID']
+        order = OrderService().enqueue_order(app.config['TEST_USER_ID'], product_id, 2)
+        assert OrderService().process_queued_orders([order.id]) == {order.id: 'confirmed'}
+        # A second worker holding the same id (e.g. after recovery) must not take stock again
+        assert OrderService().process_queued_orders([order.id]) == {}
+        assert db.session.get(Product, product_id).stock == TEST_PRODUCT['stock'] - 2
+
+
+def test_sharded_stock_spreads_large_orders_and_reports_total(app):
+    with app.app_context():
+        product_id = app.config['TEST_PRODUCT_ID']
+        user_id = app.config['TEST_USER_ID']
+        assert ProductService().set_stock_shards(product_id, 4)['stock'] == TEST_PRODUCT['stock']
+        # 5 units over shards of 2/1/1/1: no single shard has 4, so the order gathers across them
+        OrderService().place_order(user_id, product_id, 4)
+        with pytest.raises(ValueError, match='Insufficient stock'):
+            OrderService().place_order(user_id, product_id, 2)
+        assert app.extensions['stock_reconciler'].reconcile() == 1
+        assert db.session.get(Product, product_id).stock == 1
+        assert ProductService().set_stock_shards(product_id, 0)['stock'] == 1
+        assert ProductStockShard.query.count() == 0
+
+
+def test_reconcile_does_not_overwrite_unsharded_stock(app):
+    with app.app_context():
+        product_id = app.config['TEST_PRODUCT_ID']
+        repo = ProductRepository()
+        repo.shard_stock(product_id, 2)
+        totals = repo.shards.totals
+        # Shards are folded back between the reconciler's read and its write
+        repo.shards.totals = lambda: (repo.shard_stock(product_id, 0, stock=3), totals())[1]
+        repo.reconcile_sharded_stock()
+        assert db.session.get(Product, product_id).stock == 3
+        # Orders take the folded-back stock from the product row again
+        assert OrderService().place_order(app.config['TEST_USER_ID'], product_id, 3)
+        assert db.session.get(Product, product_id).stock == 0
+
+
+def test_sales_rollups_and_backfill(client, app):
+    product_id = app.config['TEST_PRODUCT_ID']
+    with app.app_context():
+        user_id = app.config['TEST_USER_ID']
+        OrderService().place_order(user_id, product_id, 2)
+        OrderService().place_order(user_id, product_id, 1)
+        assert app.extensions['sales_rollup'].flush() == 2
+        today = Order.query.first().created_at.date().isoformat()
+
+    headers = get_auth_headers(app, role='admin')
+    params = f'start={today}&end={today}'
+    expected_daily = [{'day': today, 'orders': 2, 'units': 3, 'revenue': '59.97'}]
+    expected_products = [{'day': today, 'product_id': product_id, 'units': 3, 'revenue': '59.97'}]
+    assert client.get(f'/api/reports/sales/daily?{params}', headers=headers).get_json() == expected_daily
+    assert client.get(f'/api/reports/sales/products?{params}', headers=headers).get_json() == expected_products
+
+    with app.app_context():
+        summary = SalesReportService().rebuild_rollups(chunk_size=1)
+        assert summary == {'orders': 2, 'lines': 2, 'chunks': 2}
+    assert client.get(f'/api/reports/sales/daily?{params}', headers=headers).get_json() == expected_daily
+    assert client.get(f'/api/reports/sales/daily?{params}', headers=get_auth_headers(app)).status_code == 403
+
+
+def test_backfill_counts_every_placed_order_once(app):
+    product_id = app.config['TEST_PRODUCT_ID']
+    with app.app_context():
+        user_id = app.config['TEST_USER_ID']
+        buffer = app.extensions['sales_rollup']
+        shipped = OrderService().place_order(user_id, product_id, 1)
+        buffer.flush()
+        db.session.get(Order, shipped.id).status = 'shipped'
+        db.session.add(Order(user_id=user_id, product_id=product_id, quantity=1, status='rejected'))
+        db.session.commit()
+        late = OrderService().place_order(user_id, product_id, 2)
+
+        summary = SalesReportService().rebuild_rollups()
+        # The pending order is now counted by the backfill, not by the buffer
+        assert summary['orders'] == 2
+        assert buffer.flush() == 0
+        buffer.record(late.id, late.created_at.date(), [(product_id, 2, 19.99)])
+        assert buffer.flush() == 0
+        assert [(row.orders, row.units) for row in DailySales.query.all()] == [(2, 3)]
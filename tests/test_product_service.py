@@ -1,8 +1,14 @@
+import time
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from flask_jwt_extended import create_access_token, JWTManager
 from http import HTTPStatus
+from werkzeug.http import parse_date
 
 from app import create_app, db
+from app.application.product_service import ProductService
+from app.infrastructure.search_index import ProductSearchIndex
 from app.domain.user import User
 from app.domain.product import Product
 
@@ -164,7 +170,7 @@ class TestProductEndpoints:
         assert response.status_code == HTTPStatus.FORBIDDEN
     
     def test_get_products_empty(self, client, app):
-        response = client.get('/api/products')
+        response = client.get('/api/products?count=exact')
 
         assert response.status_code == HTTPStatus.OK
         response_data = response.get_json()
@@ -180,7 +186,7 @@ class TestProductEndpoints:
             headers = get_auth_headers(app)
             created_products = create_test_products(client, headers)
 
-            response = client.get('/api/products')
+            response = client.get('/api/products?count=exact')
 
             assert response.status_code == HTTPStatus.OK
             response_data = response.get_json()
@@ -281,4 +287,371 @@ class TestProductEndpoints:
             f'/api/products/{non_existent_id}',
             headers=headers
         )
-        assert response.status_code == HTTPStatus.NOT_FOUND
\ No newline at end of file
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_get_products_paginated(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            create_test_products(client, headers)
+
+            response = client.get('/api/products?limit=2&count=exact')
+            assert response.status_code == HTTPStatus.OK
+            first_page = response.get_json()
+            assert [p['name'] for p in first_page['products']] == ['Laptop', 'Mouse']
+            assert first_page['total'] == 3
+            assert first_page['next_cursor']
+
+            response = client.get(f"/api/products?limit=2&cursor={first_page['next_cursor']}")
+            second_page = response.get_json()
+            assert [p['name'] for p in second_page['products']] == ['Keyboard']
+            assert second_page['next_cursor'] is None
+            assert second_page['total'] is None
+
+    def test_get_products_sorted_by_price_with_filters(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            create_test_products(client, headers)
+
+            response = client.get('/api/products?sort=price&limit=1&max_price=100&count=exact')
+            page = response.get_json()
+            assert [p['name'] for p in page['products']] == ['Mouse']
+            assert page['total'] == 2
+
+            response = client.get(f"/api/products?sort=price&limit=1&max_price=100&cursor={page['next_cursor']}")
+            assert [p['name'] for p in response.get_json()['products']] == ['Keyboard']
+
+            response = client.get('/api/products?name_prefix=Ke')
+            page = response.get_json()
+            assert [p['name'] for p in page['products']] == ['Keyboard']
+            assert page['total'] is None
+
+    def test_get_products_invalid_query(self, client, app):
+        response = client.get('/api/products?limit=0')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        response = client.get('/api/products?cursor=not-a-cursor')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_products_tampered_cursor(self, client, app):
+        from app.application.pagination import encode_cursor
+        for values in ({'s': 'price', 'k': [1], 'i': 1}, {'s': 'name', 'k': 5, 'i': 1}, {'s': 'price', 'k': 1, 'i': True}):
+            response = client.get(f"/api/products?sort={values['s']}&limit=1&cursor={encode_cursor(values)}")
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_product_cache_hit_and_invalidation(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            product_id = create_test_products(client, headers, [TEST_PRODUCTS[0]])[0]['product_id']
+
+            service = ProductService()
+            assert service.get_product_by_id(product_id).name == 'Laptop'
+            db.session.expire_all()
+            assert service.get_product_by_id(product_id).name == 'Laptop'
+
+            response = client.get('/api/products/cache-stats', headers=headers)
+            assert response.status_code == HTTPStatus.OK
+            assert response.get_json()['hits'] == 1
+
+            client.put(f'/api/products/{product_id}', json={'name': 'Renamed'}, headers=headers)
+            db.session.expire_all()
+            assert service.get_product_by_id(product_id).name == 'Renamed'
+
+    def test_product_cache_stats_forbidden(self, client, app):
+        response = client.get('/api/products/cache-stats', headers=get_auth_headers(app, role='user'))
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_search_products(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            created = create_test_products(client, headers)
+
+            response = client.get('/api/products/search?q=lap')
+            assert response.status_code == HTTPStatus.OK
+            data = response.get_json()
+            assert data['total'] == 1
+            assert data['products'][0]['name'] == 'Laptop'
+
+            mouse_id = created[1]['product_id']
+            client.put(f'/api/products/{mouse_id}', json={'name': 'Laptop Mouse'}, headers=headers)
+            client.delete(f"/api/products/{created[0]['product_id']}", headers=headers)
+            data = client.get('/api/products/search?q=laptop').get_json()
+            assert [p['name'] for p in data['products']] == ['Laptop Mouse']
+
+            response = client.get('/api/products/search')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_search_sees_writes_from_other_workers(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            create_test_products(client, headers)
+            assert client.get('/api/products/search?q=monitor').get_json()['total'] == 0
+
+            # Writes made elsewhere reach only the database and the shared change log
+            other_worker = ProductService(search_index=ProductSearchIndex())
+            monitor = other_worker.create_product(name='Monitor', price=199.99, stock=4)
+            data = client.get('/api/products/search?q=monitor').get_json()
+            assert [p['name'] for p in data['products']] == ['Monitor']
+
+            other_worker.update_product(monitor.id, name='Curved Display')
+            assert client.get('/api/products/search?q=monitor').get_json()['total'] == 0
+            assert client.get('/api/products/search?q=curved').get_json()['total'] == 1
+            other_worker.delete_product(monitor.id)
+            assert client.get('/api/products/search?q=curved').get_json()['total'] == 0
+            assert app.extensions['product_search_index'].builds == 1
+
+    def test_search_index_survives_stock_writes(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            product_id = create_test_products(client, headers)[0]['product_id']
+            client.get('/api/products/search?q=laptop')
+
+            client.put(f'/api/products/{product_id}', json={'stock': 3}, headers=headers)
+            client.put(f'/api/products/{product_id}', json={'name': 'Laptop Pro'}, headers=headers)
+            data = client.get('/api/products/search?q=pro').get_json()
+            assert [p['name'] for p in data['products']] == ['Laptop Pro']
+            assert app.extensions['product_search_index'].builds == 1
+
+    def test_import_products_ndjson(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            client.get('/api/products/search?q=warmup')
+            feed = '\n'.join([
+                '{"name": "Monitor", "price": 199.99, "stock": 4}',
+                '{"name": "", "price": 5, "stock": 1}',
+                'not json',
+                '{"name": "Webcam", "price": 49.5, "stock": 12}',
+            ])
+            response = client.post(
+                '/api/products/import?chunk_size=2',
+                data=feed,
+                headers={**headers, 'Content-Type': 'application/x-ndjson'}
+            )
+
+            assert response.status_code == HTTPStatus.OK
+            report = response.get_json()
+            assert report['processed'] == 4
+            assert report['imported'] == 2
+            assert [e['row'] for e in report['errors']] == [2, 3]
+            assert Product.query.count() == 2
+            assert client.get('/api/products/search?q=webcam').get_json()['total'] == 1
+
+    def test_import_products_csv(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            feed = 'name,price,stock\nDesk,120.00,3\nChair,abc,2\n'
+            response = client.post(
+                '/api/products/import',
+                data=feed,
+                headers={**headers, 'Content-Type': 'text/csv'}
+            )
+
+            report = response.get_json()
+            assert report['imported'] == 1
+            assert report['errors'][0]['row'] == 2
+            assert Product.query.filter_by(name='Desk').one().stock == 3
+
+    def test_import_products_forbidden(self, client, app):
+        response = client.post(
+            '/api/products/import',
+            data='{}',
+            headers=get_auth_headers(app, role='user')
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_bulk_update_patches(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            created = create_test_products(client, headers)
+            laptop_id, mouse_id = created[0]['product_id'], created[1]['product_id']
+            ProductService().get_product_by_id(laptop_id)
+
+            response = client.patch(
+                '/api/products/bulk',
+                json={'patches': [
+                    {'id': laptop_id, 'price': 899.0},
+                    {'id': mouse_id, 'stock': 0},
+                    {'id': 9999, 'price': 1.0},
+                ], 'batch_size': 2},
+                headers=headers
+            )
+
+            assert response.status_code == HTTPStatus.OK
+            assert response.get_json() == {'affected': 2, 'batches': 2}
+            db.session.expire_all()
+            assert ProductService().get_product_by_id(laptop_id).price == 899.0
+            assert db.session.get(Product, mouse_id).stock == 0
+
+    def test_bulk_update_rule(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            create_test_products(client, headers)
+
+            response = client.patch(
+                '/api/products/bulk',
+                json={'rule': {'price_percent': 10, 'filters': {'min_stock': 30}}, 'batch_size': 1},
+                headers=headers
+            )
+
+            assert response.get_json() == {'affected': 2, 'batches': 2}
+            prices = {p.name: p.price for p in Product.query.all()}
+            assert prices == {'Laptop': 999.99, 'Mouse': 27.49, 'Keyboard': 65.99}
+
+    def test_bulk_update_rule_keeps_other_shared_entries(self, client, app):
+        from app.infrastructure.cache import build_cache
+        from app.infrastructure.cart_store import KeyValueCartStore
+        from app.infrastructure.product_repository import ProductRepository
+        from app.infrastructure.token_revocation import SharedTokenRevocationList
+        with app.app_context():
+            headers = get_auth_headers(app)
+            mouse_id = create_test_products(client, headers)[1]['product_id']
+            shared = app.extensions['shared_cache']
+            revocations = SharedTokenRevocationList(shared)
+            revocations.revoke('revoked-jti', time.time() + 60)
+            cart = KeyValueCartStore(shared).create(user_id=1)
+            service = ProductService(ProductRepository(cache=build_cache(10, 60, 'shared', shared=shared)))
+            assert service.get_product_by_id(mouse_id).price == 24.99
+
+            service.bulk_update_products(rule={'price_percent': 10, 'filters': {'min_stock': 30}})
+
+            assert revocations.is_revoked('revoked-jti')
+            assert KeyValueCartStore(shared).get(cart['id']) is not None
+            db.session.expire_all()
+            assert service.get_product_by_id(mouse_id).price == 27.49
+
+    def test_bulk_update_invalid(self, client, app):
+        headers = get_auth_headers(app)
+        response = client.patch('/api/products/bulk', json={}, headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_products_conditional(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            product_id = create_test_products(client, headers, [TEST_PRODUCTS[0]])[0]['product_id']
+
+            response = client.get('/api/products')
+            etag = response.headers['ETag']
+            assert response.headers['Last-Modified']
+
+            response = client.get('/api/products', headers={'If-None-Match': etag})
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+            assert response.data == b''
+
+            response = client.get('/api/products?limit=1', headers={'If-None-Match': etag})
+            assert response.status_code == HTTPStatus.OK
+
+            client.put(f'/api/products/{product_id}', json={'stock': 1}, headers=headers)
+            response = client.get('/api/products', headers={'If-None-Match': etag})
+            assert response.status_code == HTTPStatus.OK
+            assert response.headers['ETag'] != etag
+
+    def test_get_product_detail_conditional(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            product_id = create_test_products(client, headers, [TEST_PRODUCTS[0]])[0]['product_id']
+            # A validator from the current second is never trusted on its own
+            catalog_version = app.extensions['catalog_version']
+            version, modified = catalog_version.current()
+            catalog_version.store.set(catalog_version.KEY, (version, modified - timedelta(seconds=5)))
+
+            response = client.get(f'/api/products/{product_id}')
+            assert response.status_code == HTTPStatus.OK
+            assert response.get_json()['name'] == 'Laptop'
+
+            response = client.get(
+                f'/api/products/{product_id}',
+                headers={'If-Modified-Since': response.headers['Last-Modified']}
+            )
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+            assert client.get('/api/products/9999').status_code == HTTPStatus.NOT_FOUND
+
+    def test_if_modified_since_after_same_second_write(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            product_id = create_test_products(client, headers, [TEST_PRODUCTS[0]])[0]['product_id']
+
+            last_modified = client.get(f'/api/products/{product_id}').headers['Last-Modified']
+            client.put(f'/api/products/{product_id}', json={'stock': 1}, headers=headers)
+            response = client.get(
+                f'/api/products/{product_id}',
+                headers={'If-Modified-Since': last_modified}
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert response.get_json()['stock'] == 1
+
+            for stock in range(20):
+                client.put(f'/api/products/{product_id}', json={'stock': stock}, headers=headers)
+            last_modified = parse_date(client.get(f'/api/products/{product_id}').headers['Last-Modified'])
+            assert last_modified <= datetime.now(timezone.utc)
+
+    def test_get_products_streaming(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            create_test_products(client, headers)
+
+            response = client.get('/api/products?stream=json&sort=price')
+            assert response.status_code == HTTPStatus.OK
+            assert [p['name'] for p in response.get_json()] == ['Mouse', 'Keyboard', 'Laptop']
+
+            response = client.get('/api/products?stream=ndjson&max_price=100')
+            assert response.mimetype == 'application/x-ndjson'
+            assert len(response.get_data(as_text=True).splitlines()) == 2
+
+            response = client.get('/api/products?stream=json&cursor=bad')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_products_by_ids(self, client, app):
+        with app.app_context():
+            headers = get_auth_headers(app)
+            created = create_test_products(client, headers)
+            ids = [p['product_id'] for p in created]
+            ProductService().get_product_by_id(ids[2])
+
+            response = client.get(f'/api/products?ids={ids[2]},9999,{ids[0]},{ids[2]}')
+
+            assert response.status_code == HTTPStatus.OK
+            data = response.get_json()
+            assert [p['name'] for p in data['products']] == ['Keyboard', 'Laptop']
+            assert data['missing'] == [9999]
+
+            response = client.get('/api/products?ids=1,abc')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_lru_cache_eviction_and_ttl():
+    from app.infrastructure.cache import LRUCache
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'evictions': 2, 'size': 1}
+
+
+def test_search_index_ranking_and_prefix():
+    from app.infrastructure.search_index import ProductSearchIndex
+    index = ProductSearchIndex()
+    index.build([(1, 'Gaming Laptop'), (2, 'Laptop Stand'), (3, 'Laptop'), (4, 'Keyboard')])
+    results, total = index.search('laptop')
+    assert total == 3
+    assert results[0][0] == 3
+    assert [doc_id for doc_id, _ in index.search('key')[0]] == [4]
+    index.remove(4)
+    index.add(5, 'Mechanical Keyboard')
+    assert [doc_id for doc_id, _ in index.search('keyb')[0]] == [5]
+
+
+def test_search_index_scores_top_postings_only():
+    from app.infrastructure.search_index import ProductSearchIndex
+    index = ProductSearchIndex()
+    index.MAX_POSTINGS_SCORED = 2
+    index.build([(1, 'Laptop Stand Pro Max'), (2, 'Laptop'), (3, 'Laptop Laptop'), (4, 'Gaming Laptop Bag')])
+    results, total = index.search('laptop')
+    assert total == 4
+    assert [doc_id for doc_id, _ in results] == [3, 2]
+    index.add(5, 'Laptop Laptop Laptop')
+    assert index.search('laptop')[0][0][0] == 5